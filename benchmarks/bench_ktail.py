@@ -0,0 +1,150 @@
+"""Benchmarks of the stages of `ktail` on synthetic traces.
+
+Each stage reported by `ktail` (e.g., PTA generation, future computation, future mapping, model inference,
+renaming) is measured for its wall time and peak memory, for each way of computing the future map (see `ENGINES`),
+varying one of the trace count, trace length, alphabet size and k at a time from a base configuration,
+for each trace generator in `benchmarks.generators`.
+
+Usage (from the root of the repository):
+    python -m benchmarks.bench_ktail --output bench_results.json [--baseline benchmarks/baseline.json] [--quick]
+                                     [--engine ENGINE ...]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+
+from benchmarks.generators import GENERATORS
+from ktail import ktail
+
+# name -> options of `ktail` for each way of computing the future map
+ENGINES = {
+    'pta': dict(),
+    'prefix_tree': dict(prefix_tree=True),
+    'compact': dict(compact=True),
+    'kgram': dict(engine='kgram'),
+    'fingerprint': dict(engine='fingerprint'),
+}
+
+BASE = {'traces': 200, 'length': 20, 'alphabet': 10, 'k': 2}
+SCALES = {
+    'traces': [100, 200, 400, 800],
+    'length': [10, 20, 40, 80],
+    'alphabet': [5, 10, 50, 200],
+    'k': [1, 2, 3, 4],
+}
+QUICK_BASE = {'traces': 50, 'length': 10, 'alphabet': 5, 'k': 2}
+QUICK_SCALES = {
+    'traces': [50, 100],
+    'length': [10, 20],
+    'alphabet': [5, 20],
+    'k': [1, 2, 3],
+}
+
+
+def measure(words, k, engine='pta'):
+    """Return the wall time (in seconds) and peak memory (in bytes) of each stage of `ktail` for the given words,
+    as reported by its metrics (see `instrumentation.measure_stage`).
+    The time is measured in a run without memory tracing, which would slow down the stages.
+    The peak memory of a stage is the peak of the memory allocated during the stage, i.e., above the memory
+    still allocated at its start (e.g., the PTA in the later stages).
+
+    :param words: list of words
+    :param k: the parameter k
+    :param engine: name of the options of `ktail` (see `ENGINES`)
+    :return: dictionary from the name of each stage to its measures
+    """
+    results = dict()
+
+    def record_time(stage, report):
+        results[stage] = {'time': report['wall_time']}
+
+    def record_memory(stage, report):
+        results[stage]['peak_memory'] = report['peak_memory']
+
+    ktail(words, k, metrics=record_time, **ENGINES[engine])
+    ktail(words, k, metrics=record_memory, trace_memory=True, **ENGINES[engine])
+    return results
+
+
+def configurations(quick=False, engines=None):
+    """Yield the configurations varying one parameter at a time from the base configuration, for each engine."""
+    base, scales = (QUICK_BASE, QUICK_SCALES) if quick else (BASE, SCALES)
+    seen = set()
+    for generator in GENERATORS:
+        for parameter, values in scales.items():
+            for value in values:
+                for engine in engines or ENGINES:
+                    config = dict(base, generator=generator, engine=engine, **{parameter: value})
+                    key = tuple(sorted(config.items()))
+                    if key not in seen:
+                        seen.add(key)
+                        yield config
+
+
+def run(quick=False, seed=0, engines=None):
+    results = []
+    for config in configurations(quick, engines=engines):
+        words = GENERATORS[config['generator']](config['traces'], config['length'], config['alphabet'], seed=seed)
+        for stage, measures in measure(words, config['k'], engine=config['engine']).items():
+            results.append(dict(config, stage=stage, **measures))
+            print(f"{config['generator']:>16} {config['engine']:>11} traces={config['traces']:<4} "
+                  f"length={config['length']:<3} alphabet={config['alphabet']:<4} k={config['k']} {stage:>11}: "
+                  f"{measures['time'] * 1000:9.2f} ms {measures['peak_memory'] / 1024:9.0f} KiB")
+    return results
+
+
+def _key(result):
+    # (the results saved before the engines were benchmarked have no engine)
+    return tuple(result.get(name) for name in ('engine', 'generator', 'traces', 'length', 'alphabet', 'k', 'stage'))
+
+
+def compare(results, baseline, tolerance=1.5, min_time=0.005, min_memory=64 * 1024):
+    """Return the regressions of the results compared to the baseline, i.e., the measures of the same configurations
+    and stages that are more than `tolerance` times the baseline (ignoring differences below the given minimums).
+    """
+    baseline = {_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        base = baseline.get(_key(result))
+        if base is None:
+            continue
+        for measure, minimum in (('time', min_time), ('peak_memory', min_memory)):
+            if result[measure] > base[measure] * tolerance and result[measure] - base[measure] > minimum:
+                regressions.append(dict(result, measure=measure, baseline=base[measure]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the stages of ktail on synthetic traces.')
+    parser.add_argument('--output', default='bench_results.json', help='file to save the results (JSON)')
+    parser.add_argument('--baseline', help='results (JSON) to compare with, if the file exists')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='ratio to the baseline considered a regression')
+    parser.add_argument('--quick', action='store_true', help='run a smaller set of configurations')
+    parser.add_argument('--seed', type=int, default=0, help='random seed of the trace generators')
+    parser.add_argument('--engine', action='append', choices=list(ENGINES), dest='engines',
+                        help='engine to benchmark (can be repeated, default: all of them)')
+    args = parser.parse_args(argv)
+
+    results = run(quick=args.quick, seed=args.seed, engines=args.engines)
+    with open(args.output, 'w') as f:
+        json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'quick': args.quick,
+                   'results': results}, f, indent=1)
+    print(f'Results saved to {args.output}')
+
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, tolerance=args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {_key(regression)} {regression['measure']}: "
+                  f"{regression[regression['measure']]:.4g} (baseline: {regression['baseline']:.4g})")
+        if regressions:
+            return 1
+        print(f'No regressions compared to {args.baseline}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
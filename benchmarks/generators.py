@@ -0,0 +1,77 @@
+import random
+from typing import List
+
+
+def random_fsm_walks(n_traces: int, length: int, alphabet_size: int, n_states: int = 10, seed: int = 0) -> List[str]:
+    """Return words generated by random walks over a random (ground-truth) FSM.
+    Each state has two to four outgoing transitions, and each walk stops after `length` events.
+
+    :param n_traces: number of words
+    :param length: number of events in each word
+    :param alphabet_size: number of distinct events
+    :param n_states: number of states of the ground-truth FSM (default: 10)
+    :param seed: random seed (default: 0)
+    :return: list of whitespace-separated words
+    """
+    rng = random.Random(seed)
+    alphabet = [f'e{i}' for i in range(alphabet_size)]
+    transitions = {state: [(rng.choice(alphabet), rng.randrange(n_states)) for _ in range(rng.randint(2, 4))]
+                   for state in range(n_states)}
+
+    words = []
+    for _ in range(n_traces):
+        state = 0
+        word = []
+        for _ in range(length):
+            symbol, state = rng.choice(transitions[state])
+            word.append(symbol)
+        words.append(' '.join(word))
+    return words
+
+
+def loop_heavy_traces(n_traces: int, length: int, alphabet_size: int, seed: int = 0) -> List[str]:
+    """Return words made of a few events repeated in loops (e.g., polling or retries),
+    with an occasional event from the rest of the alphabet in between.
+
+    :param n_traces: number of words
+    :param length: number of events in each word
+    :param alphabet_size: number of distinct events
+    :param seed: random seed (default: 0)
+    :return: list of whitespace-separated words
+    """
+    rng = random.Random(seed)
+    alphabet = [f'e{i}' for i in range(alphabet_size)]
+    loops = [alphabet[i:i + 3] for i in range(0, min(alphabet_size, 9), 3)]
+
+    words = []
+    for _ in range(n_traces):
+        word = []
+        while len(word) < length:
+            if rng.random() < 0.1:
+                word.append(rng.choice(alphabet))
+            else:
+                word.extend(rng.choice(loops) * rng.randint(1, 5))
+        words.append(' '.join(word[:length]))
+    return words
+
+
+def large_alphabet_traces(n_traces: int, length: int, alphabet_size: int, seed: int = 0) -> List[str]:
+    """Return words whose events are drawn from a (large) alphabet with a Zipf-like distribution.
+
+    :param n_traces: number of words
+    :param length: number of events in each word
+    :param alphabet_size: number of distinct events
+    :param seed: random seed (default: 0)
+    :return: list of whitespace-separated words
+    """
+    rng = random.Random(seed)
+    alphabet = [f'e{i}' for i in range(alphabet_size)]
+    weights = [1 / (i + 1) for i in range(alphabet_size)]
+    return [' '.join(rng.choices(alphabet, weights=weights, k=length)) for _ in range(n_traces)]
+
+
+GENERATORS = {
+    'random_fsm_walks': random_fsm_walks,
+    'loop_heavy': loop_heavy_traces,
+    'large_alphabet': large_alphabet_traces,
+}
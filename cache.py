@@ -0,0 +1,145 @@
+import gc
+import hashlib
+import os
+import pickle
+import struct
+import tempfile
+from typing import Iterable, Sequence, Union
+
+SUFFIX = '.pkl'
+
+
+class InferenceCache:
+    """A content-addressed on-disk cache for the results of model inference (e.g., PTAs, future maps and models).
+
+    Each result is pickled in its own file in the cache directory, named after its key (see `key`).
+    The cache is limited in size: when it is larger than `max_size` bytes, the least recently used results
+    (whose files were the least recently read or written) are removed.
+    """
+
+    def __init__(self, cache_dir, max_size=1 << 30):
+        """
+        :param cache_dir: path to the cache directory (created if it does not exist)
+        :param max_size: maximum total size of the cached results in bytes (default: 1 GiB)
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def digest(words: Iterable[Union[str, Sequence[str]]], sep=' ') -> str:
+        """Return the hash of a set of words, i.e., the SHA-256 of their sequences of symbols (in order),
+        where each word is hashed as its number of symbols, the lengths of its symbols and then the symbols,
+        so that different sequences of symbols never have the same input to the hash.
+        A word has the same hash as the sequence of its symbols (split by the separator).
+
+        :param words: iterable of words or of sequences of symbols
+        :param sep: separator between symbols in the words (None for whitespace, see `str.split`)
+        :return: hexadecimal digest
+        """
+        h = hashlib.sha256()
+        for word in words:
+            symbols = [symbol.encode('utf-8') for symbol in (word.split(sep) if isinstance(word, str) else word)]
+            h.update(struct.pack(f'<{len(symbols) + 1}Q', len(symbols), *map(len, symbols)))
+            h.update(b''.join(symbols))
+        return h.hexdigest()
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Return the key of a result from the parts it depends on (e.g., the digest of the words, k, and the version
+        of the algorithm), which must have a stable `repr`.
+
+        :param parts: parts of the key
+        :return: hexadecimal key
+        """
+        return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + SUFFIX)
+
+    def get(self, key: str, default=None):
+        """Return the result cached for a given key (and mark it as recently used).
+
+        :param key: key
+        :param default: value returned if there is no result for the key (default: None)
+        :return: cached result, or the default value
+        """
+        path = self._path(key)
+        # the garbage collector is paused while unpickling, since it would otherwise run many times
+        # (for nothing) while the many containers of a large result are created
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # a corrupted or outdated result is removed
+            self._remove(path)
+            self.misses += 1
+            return default
+        finally:
+            if gc_enabled:
+                gc.enable()
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value):
+        """Cache a result for a given key, and remove the least recently used results if the cache is too large.
+
+        :param key: key
+        :param value: result (picklable)
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            # replace atomically, so that concurrent readers never see a partially written result
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self._evict(keep=self._path(key))
+
+    def size(self) -> int:
+        """Return the total size of the cached results in bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def clear(self):
+        """Remove all the cached results."""
+        for _, _, path in self._entries():
+            self._remove(path)
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self, keep=None):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            if path != keep:
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
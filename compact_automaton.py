@@ -0,0 +1,224 @@
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+
+from finite_state_automaton import FiniteStateAutomaton as FSM
+
+
+class CompactAutomaton:
+    """A read-only, memory-efficient representation of a finite state automaton.
+
+    Symbols and states are interned to integers (their indices in `symbols` and `state_names`),
+    and the transitions are stored in CSR (compressed sparse row) arrays:
+    the transitions of the state with id `s` are the edges `offsets[s]` to `offsets[s + 1] - 1`,
+    sorted by symbol id and target state id, where the i-th edge reads `edge_symbols[i]` and goes to `edge_targets[i]`.
+
+    The number of traces taking each edge (see `FiniteStateAutomaton.transition_counts`) is `edge_counts[i]`,
+    if the transitions are counted.
+
+    It provides the same attributes and methods as `FiniteStateAutomaton` (e.g., `is_accepted()`, `draw()`),
+    where the set- and dict-based attributes are created lazily (once) only when they are accessed.
+    """
+    __slots__ = ('symbols', 'state_names', 'initial_state_id', 'final_flags', 'offsets', 'edge_symbols',
+                 'edge_targets', 'edge_counts', 'final_counts', '_symbol_ids', '_state_ids', '_fsm')
+
+    symbols: List[str]
+    state_names: List[str]
+    initial_state_id: int
+    final_flags: bytearray  # state id -> 1 if final, 0 otherwise
+    offsets: array  # state id -> index of its first edge (plus the total number of edges at the end)
+    edge_symbols: array  # edge -> symbol id
+    edge_targets: array  # edge -> target state id
+    edge_counts: Optional[array]  # edge -> number of traces, or None if the transitions are not counted
+    final_counts: Dict[str, int]  # final state -> number of traces
+
+    def __init__(self, symbols, state_names, initial_state_id, final_flags, offsets, edge_symbols, edge_targets,
+                 edge_counts=None, final_counts=None):
+        assert len(offsets) == len(state_names) + 1
+        assert len(edge_symbols) == len(edge_targets) == offsets[-1]
+        assert edge_counts is None or len(edge_counts) == len(edge_targets)
+        self.symbols = symbols
+        self.state_names = state_names
+        self.initial_state_id = initial_state_id
+        self.final_flags = final_flags
+        self.offsets = offsets
+        self.edge_symbols = edge_symbols
+        self.edge_targets = edge_targets
+        self.edge_counts = edge_counts
+        self.final_counts = final_counts if final_counts is not None else dict()
+        self._symbol_ids = None
+        self._state_ids = None
+        self._fsm = None
+
+    @classmethod
+    def from_fsm(cls, m: FSM) -> 'CompactAutomaton':
+        """Return the compact representation of the given FSM.
+
+        :param m: FSM
+        :return: compact automaton
+        """
+        symbols = sorted(m.alphabet | {symbol for (_, symbol) in m.transitions.keys()})
+        symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+        state_names = sorted(m.states | {m.initial_state} | {state for (state, _) in m.transitions.keys()}
+                             | {next_state for next_states in m.transitions.values() for next_state in next_states})
+        state_ids = {state: i for i, state in enumerate(state_names)}
+
+        final_flags = bytearray(len(state_names))
+        for state in m.final_states:
+            final_flags[state_ids[state]] = 1
+
+        offsets = array('Q', [0])
+        edge_symbols = array('I')
+        edge_targets = array('I')
+        edge_counts = array('Q') if m.transition_counts else None
+        for state in state_names:
+            for symbol_id, symbol in sorted((symbol_ids[symbol], symbol) for symbol in m.outgoing(state)):
+                next_states = sorted(m.outgoing(state)[symbol], key=state_ids.__getitem__)
+                edge_symbols.extend([symbol_id] * len(next_states))
+                edge_targets.extend(state_ids[next_state] for next_state in next_states)
+                if edge_counts is not None:
+                    edge_counts.extend(m.transition_counts.get((state, symbol, next_state), 0)
+                                       for next_state in next_states)
+            offsets.append(len(edge_targets))
+
+        return cls(symbols, state_names, state_ids[m.initial_state], final_flags, offsets, edge_symbols, edge_targets,
+                   edge_counts=edge_counts, final_counts=dict(m.final_counts))
+
+    def to_fsm(self) -> FSM:
+        """Return this automaton as a (new) `FiniteStateAutomaton`.
+
+        :return: FSM
+        """
+        m = FSM()
+        m.alphabet = set(self.symbols)
+        m.states = set(self.state_names)
+        m.initial_state = self.state_names[self.initial_state_id]
+        m.final_states = {self.state_names[i] for i, flag in enumerate(self.final_flags) if flag}
+        for state_id, state in enumerate(self.state_names):
+            for i in range(self.offsets[state_id], self.offsets[state_id + 1]):
+                m.add_transition(state, self.symbols[self.edge_symbols[i]], self.state_names[self.edge_targets[i]],
+                                 count=self.edge_counts[i] if self.edge_counts is not None else None)
+        m.final_counts = dict(self.final_counts)
+        return m
+
+    def _as_fsm(self) -> FSM:
+        if self._fsm is None:
+            self._fsm = self.to_fsm()
+        return self._fsm
+
+    @property
+    def alphabet(self) -> Set[str]:
+        return self._as_fsm().alphabet
+
+    @property
+    def states(self) -> Set[str]:
+        return self._as_fsm().states
+
+    @property
+    def initial_state(self) -> str:
+        return self.state_names[self.initial_state_id]
+
+    @property
+    def final_states(self) -> Set[str]:
+        return self._as_fsm().final_states
+
+    @property
+    def transitions(self) -> Dict:
+        return self._as_fsm().transitions
+
+    @property
+    def transition_counts(self) -> Dict:
+        return self._as_fsm().transition_counts
+
+    def symbol_id(self, symbol):
+        """Return the id of a given symbol, or None if it is not in the alphabet."""
+        if self._symbol_ids is None:
+            self._symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        return self._symbol_ids.get(symbol)
+
+    def state_id(self, state):
+        """Return the id of a given state, or None if it is not a state of the automaton."""
+        if self._state_ids is None:
+            self._state_ids = {state: i for i, state in enumerate(self.state_names)}
+        return self._state_ids.get(state)
+
+    def step(self, state_ids, symbol_id) -> Set[int]:
+        """Return the ids of all possible next states from the given states with a given symbol.
+
+        :param state_ids: ids of the current states
+        :param symbol_id: id of the symbol
+        :return: a set of ids of the next states
+        """
+        next_state_ids = set()
+        for state_id in state_ids:
+            for i in range(self.offsets[state_id], self.offsets[state_id + 1]):
+                if self.edge_symbols[i] == symbol_id:
+                    next_state_ids.add(self.edge_targets[i])
+        return next_state_ids
+
+    def edges(self, state_id) -> List[Tuple[str, int, int]]:
+        """Return the outgoing edges of the state with a given id.
+
+        :param state_id: id of the current state
+        :return: a list of (symbol, next state id, number of traces) triples, where the number of traces is 1
+                 if the transitions are not counted
+        """
+        counts = self.edge_counts
+        return [(self.symbols[self.edge_symbols[i]], self.edge_targets[i], counts[i] if counts is not None else 1)
+                for i in range(self.offsets[state_id], self.offsets[state_id + 1])]
+
+    def outgoing(self, state) -> Dict[str, Set[str]]:
+        """Return the outgoing transitions of a given state.
+
+        :param state: current state
+        :return: a dictionary from each enabled symbol to its set of next states
+        """
+        outgoing = dict()
+        state_id = self.state_id(state)
+        if state_id is not None:
+            for i in range(self.offsets[state_id], self.offsets[state_id + 1]):
+                outgoing.setdefault(self.symbols[self.edge_symbols[i]], set()).add(self.state_names[self.edge_targets[i]])
+        return outgoing
+
+    def next_states(self, state):
+        """Return all possible next states from a given state.
+
+        :param state: current state
+        :return: a set of next states
+        """
+        state_id = self.state_id(state)
+        if state_id is None:
+            return set()
+        return {self.state_names[self.edge_targets[i]] for i in range(self.offsets[state_id], self.offsets[state_id + 1])}
+
+    def is_accepted(self, word, sep=' '):
+        """Check if a word is accepted by the automaton.
+
+        :param word: input word
+        :param sep: separator between symbols in the word
+        :return: True if the word is accepted, False otherwise
+        """
+        current_state_ids = {self.initial_state_id}
+        for symbol in word.split(sep):
+            symbol_id = self.symbol_id(symbol)
+            if symbol_id is None:
+                return False
+            current_state_ids = self.step(current_state_ids, symbol_id)
+        return any(self.final_flags[state_id] for state_id in current_state_ids)
+
+    def is_accepted_batch(self, words, sep=' ', workers=None) -> Tuple[List[bool], List[Optional[int]]]:
+        """Check if each of the given words is accepted (see `FiniteStateAutomaton.is_accepted_batch`)."""
+        return self._as_fsm().is_accepted_batch(words, sep=sep, workers=workers)
+
+    def transition_probabilities(self) -> Dict[Tuple[str, str, str], float]:
+        """Return the probability of each transition (see `FiniteStateAutomaton.transition_probabilities`)."""
+        return self._as_fsm().transition_probabilities()
+
+    def log_likelihood_batch(self, words, sep=' ') -> List[float]:
+        """Return the log-likelihood of each of the given words (see `FiniteStateAutomaton.log_likelihood_batch`)."""
+        return self._as_fsm().log_likelihood_batch(words, sep=sep)
+
+    def draw(self, name='fsm', view=True):
+        self._as_fsm().draw(name, view=view)
+
+    def __str__(self):
+        return str(self._as_fsm())
@@ -0,0 +1,288 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from finite_state_automaton import FiniteStateAutomaton as FSM
+
+
+def shared_prefix_paths(traces: Sequence[Sequence[str]], initial, step: Callable,
+                        stop: Callable = lambda value: False) -> Iterator[Tuple[int, list]]:
+    """Read the given traces symbol by symbol, sharing the work for their common prefixes.
+
+    :param traces: sequences of symbols
+    :param initial: value before reading any symbol (e.g., a DFA state)
+    :param step: function returning the value after reading a symbol, given the value before it and the symbol
+    :param stop: function telling if a value is final, i.e., reading the rest of the trace would not change it
+                 (default: never)
+    :return: iterator of the index of each trace and its path, where path[i] is the value after reading its first i
+             symbols (up to the first value to stop at); the path is reused for the next trace
+    """
+    # visit the traces in lexicographic order, so that consecutive traces share their longest common prefixes;
+    # path[i] is the value after reading the first i symbols of the previous trace
+    path = [initial]
+    previous = ()
+    for index in sorted(range(len(traces)), key=traces.__getitem__):
+        trace = traces[index]
+
+        common = 0
+        for a, b in zip(previous, trace):
+            if a != b:
+                break
+            common += 1
+        del path[common + 1:]
+
+        for symbol in trace[len(path) - 1:]:
+            if stop(path[-1]):
+                break
+            path.append(step(path[-1], symbol))
+        previous = trace
+
+        yield index, path
+
+
+class LazyDFA:
+    """A deterministic view of a (nondeterministic) finite state automaton, built lazily by subset construction.
+
+    Each DFA state is a set of states of the automaton, identified by an integer id.
+    The DFA states and transitions are only created when they are used for the first time, and then cached,
+    so that reading a symbol from a DFA state is a single dictionary lookup after the first time.
+    """
+    DEAD = 0  # id of the DFA state of the empty set of states, from which no word is accepted
+
+    def __init__(self, m):
+        """
+        :param m: FSM
+        """
+        self.m = m
+        self.subsets: List[FrozenSet[str]] = []  # DFA state id -> set of states of the automaton
+        self.accepting: List[bool] = []  # DFA state id -> whether it is accepting
+        self._ids: Dict[FrozenSet[str], int] = dict()
+        self._table: List[Dict[str, int]] = []  # DFA state id -> {symbol -> next DFA state id}
+        self._final_states = frozenset(m.final_states)
+
+        assert self._state_id(frozenset()) == self.DEAD
+        self.initial = self._state_id(frozenset({m.initial_state}))
+
+    def _state_id(self, subset: FrozenSet[str]) -> int:
+        state_id = self._ids.get(subset)
+        if state_id is None:
+            state_id = self._ids[subset] = len(self.subsets)
+            self.subsets.append(subset)
+            self.accepting.append(not subset.isdisjoint(self._final_states))
+            self._table.append(dict())
+        return state_id
+
+    def step(self, state_id: int, symbol: str) -> int:
+        """Return the id of the DFA state reached from a given DFA state by reading a symbol.
+
+        :param state_id: id of the current DFA state
+        :param symbol: symbol
+        :return: id of the next DFA state
+        """
+        row = self._table[state_id]
+        next_id = row.get(symbol)
+        if next_id is None:
+            next_states = set()
+            for state in self.subsets[state_id]:
+                next_states |= self.m.outgoing(state).get(symbol, set())
+            next_id = row[symbol] = self._state_id(frozenset(next_states))
+        return next_id
+
+    def run(self, trace: Sequence[str], state_id: int = None) -> Tuple[int, Optional[int]]:
+        """Read a sequence of symbols from a given DFA state (default: the initial one).
+
+        :param trace: sequence of symbols
+        :param state_id: id of the DFA state to start from (default: None, the initial DFA state)
+        :return: the id of the reached DFA state, and the position of the symbol leading to the dead state (if any)
+        """
+        if state_id is None:
+            state_id = self.initial
+        for i, symbol in enumerate(trace):
+            state_id = self.step(state_id, symbol)
+            if state_id == self.DEAD:
+                return state_id, i
+        return state_id, None
+
+    def accepts_batch(self, traces: Sequence[Sequence[str]]) -> Tuple[List[bool], List[Optional[int]]]:
+        """Check if the given traces are accepted (see `is_accepted_batch`), sharing the work for common prefixes."""
+        accepted = [False] * len(traces)
+        rejected_at: List[Optional[int]] = [None] * len(traces)
+
+        for index, path in shared_prefix_paths(traces, self.initial, self.step,
+                                               stop=lambda state_id: state_id == self.DEAD):
+            state_id = path[-1]
+            position = None
+            if state_id == self.DEAD:
+                # the first position where the DFA state is dead, i.e., the symbol with no transition
+                position = path.index(self.DEAD) - 1
+            elif not self.accepting[state_id]:
+                position = len(traces[index])
+            accepted[index] = position is None
+            rejected_at[index] = position
+
+        return accepted, rejected_at
+
+
+def _complete_dfa(m) -> Tuple[List[str], List[List[int]], List[bool], int]:
+    """Determinize an FSM completely, i.e., explore all DFA states reachable from the initial one.
+
+    :param m: FSM
+    :return: the symbols, the transition table (DFA state id -> [next DFA state id for each symbol]),
+             whether each DFA state is accepting, and the id of the initial DFA state
+    """
+    symbols = sorted(set(m.alphabet).union(symbol for (_, symbol) in m.transitions.keys()))
+    dfa = LazyDFA(m)
+
+    # the ids of new DFA states are appended, so that the loop ends when no new DFA state is found
+    delta = []
+    state_id = 0
+    while state_id < len(dfa.subsets):
+        delta.append([dfa.step(state_id, symbol) for symbol in symbols])
+        state_id += 1
+    return symbols, delta, dfa.accepting, dfa.initial
+
+
+def _dfa_to_fsm(symbols, delta, accepting, initial, dead, prefix) -> FSM:
+    """Return the FSM of a DFA table (see `_complete_dfa`), leaving out the given dead DFA state (if any)."""
+    m = FSM()
+    m.alphabet = set(symbols)
+    m.states = {f'{prefix}{state_id}' for state_id in range(len(delta)) if state_id != dead}
+    m.initial_state = f'{prefix}{initial}'
+    m.states.add(m.initial_state)
+    m.final_states = {f'{prefix}{state_id}' for state_id in range(len(delta)) if accepting[state_id]}
+    for state_id, row in enumerate(delta):
+        if state_id == dead:
+            continue
+        for symbol, next_id in zip(symbols, row):
+            if next_id != dead:
+                m.add_transition(f'{prefix}{state_id}', symbol, f'{prefix}{next_id}')
+    return m
+
+
+def determinize(m) -> FSM:
+    """Return a DFA (as an FSM without the dead state) accepting the same language as the given FSM,
+    by subset construction. Only the DFA states reachable from the initial one are created.
+
+    :param m: FSM
+    :return: DFA
+    """
+    symbols, delta, accepting, initial = _complete_dfa(m)
+    return _dfa_to_fsm(symbols, delta, accepting, initial, LazyDFA.DEAD, 'd')
+
+
+def minimize(m) -> FSM:
+    """Return the minimal DFA (as an FSM without the dead state) accepting the same language as the given FSM.
+    The FSM is determinized (see `determinize`) and then minimized by Hopcroft's partition refinement algorithm.
+
+    :param m: FSM
+    :return: minimal DFA
+    """
+    symbols, delta, accepting, initial = _complete_dfa(m)
+    blocks, block_of = _partition(delta, accepting, len(symbols))
+
+    # the blocks are the states of the minimal DFA
+    block_delta = [[block_of[next_id] for next_id in delta[next(iter(block))]] for block in blocks]
+    block_accepting = [accepting[next(iter(block))] for block in blocks]
+    return _dfa_to_fsm(symbols, block_delta, block_accepting, block_of[initial], block_of[LazyDFA.DEAD], 'm')
+
+
+def _partition(delta: List[List[int]], accepting: List[bool], n_symbols: int) -> Tuple[List[Set[int]], List[int]]:
+    """Return the coarsest partition of the states of a complete DFA into blocks of equivalent states
+    (Hopcroft's algorithm), and the block of each state."""
+    n = len(delta)
+    inverse = _inverse(delta, n_symbols)
+
+    # start from the accepting and non-accepting states, and split the blocks until they are stable
+    blocks = [block for block in ({i for i in range(n) if accepting[i]}, {i for i in range(n) if not accepting[i]})
+              if block]
+    block_of = [0] * n
+    for b, block in enumerate(blocks):
+        for state_id in block:
+            block_of[state_id] = b
+    waiting = {min(range(len(blocks)), key=lambda b: len(blocks[b]))}
+
+    while waiting:
+        splitter = blocks[waiting.pop()]
+        for c in range(n_symbols):
+            # the states reaching the splitter with the symbol, grouped by their blocks
+            predecessors = dict()
+            for next_id in splitter:
+                for state_id in inverse[c][next_id]:
+                    predecessors.setdefault(block_of[state_id], set()).add(state_id)
+
+            for b, inside in predecessors.items():
+                if len(inside) < len(blocks[b]):
+                    _split(blocks, block_of, waiting, b, inside)
+
+    return blocks, block_of
+
+
+def _inverse(delta: List[List[int]], n_symbols: int) -> List[List[List[int]]]:
+    """Return the inverse transitions of a complete DFA:
+    symbol index -> DFA state id -> ids of the DFA states reaching it with the symbol."""
+    inverse = [[[] for _ in range(len(delta))] for _ in range(n_symbols)]
+    for state_id, row in enumerate(delta):
+        for c, next_id in enumerate(row):
+            inverse[c][next_id].append(state_id)
+    return inverse
+
+
+def _split(blocks: List[Set[int]], block_of: List[int], waiting: Set[int], b: int, inside: Set[int]):
+    """Split a block into the given states and the other ones, keeping the larger part in place."""
+    outside = blocks[b] - inside
+    smaller, larger = (inside, outside) if len(inside) <= len(outside) else (outside, inside)
+    blocks[b] = larger
+    blocks.append(smaller)
+    for state_id in smaller:
+        block_of[state_id] = len(blocks) - 1
+    if b in waiting:
+        waiting.add(len(blocks) - 1)
+    else:
+        waiting.add(len(blocks) - 1 if len(smaller) <= len(larger) else b)
+
+
+def _tokenize(words: Iterable[Union[str, Sequence[str]]], sep) -> List[Tuple[str, ...]]:
+    return [tuple(word.split(sep) if isinstance(word, str) else word) for word in words]
+
+
+_worker_dfa: Optional[LazyDFA] = None
+
+
+def _init_worker(m):
+    global _worker_dfa
+    _worker_dfa = LazyDFA(m)
+
+
+def _accepts_chunk(traces):
+    return _worker_dfa.accepts_batch(traces)
+
+
+def accepts_batch(m, words: Iterable[Union[str, Sequence[str]]], sep=' ', workers=None,
+                  chunk_size=10000) -> Tuple[List[bool], List[Optional[int]]]:
+    """Check if each of the given words is accepted by the FSM (see `FiniteStateAutomaton.is_accepted_batch`).
+
+    :param m: FSM
+    :param words: iterable of words or of sequences of symbols
+    :param sep: separator between symbols in the words
+    :param workers: number of worker processes (default: None, no worker processes)
+    :param chunk_size: number of words checked by a worker process at once
+    :return: a list of booleans (whether each word is accepted) and a list of rejection positions
+    """
+    traces = _tokenize(words, sep)
+
+    if workers is None or workers <= 1:
+        return LazyDFA(m).accepts_batch(traces)
+
+    # each worker process builds its own lazy DFA once, and checks the chunks of (sorted) words given to it
+    traces_sorted = sorted(range(len(traces)), key=traces.__getitem__)
+    chunks = [[traces[i] for i in traces_sorted[start:start + chunk_size]]
+              for start in range(0, len(traces), chunk_size)]
+    accepted = [False] * len(traces)
+    rejected_at = [None] * len(traces)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(m,)) as executor:
+        position = 0
+        for chunk_accepted, chunk_rejected_at in executor.map(_accepts_chunk, chunks):
+            for is_accepted, rejected in zip(chunk_accepted, chunk_rejected_at):
+                accepted[traces_sorted[position]] = is_accepted
+                rejected_at[traces_sorted[position]] = rejected
+                position += 1
+    return accepted, rejected_at
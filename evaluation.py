@@ -0,0 +1,174 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from finite_state_automaton import FiniteStateAutomaton as FSM
+from instrumentation import fsm_counters
+from ktail import final_symbol, initial_symbol, ktail
+
+# a ground truth is an FSM accepting the correct words, or a function telling if a word (sequence of symbols) is correct
+GroundTruth = Union[FSM, Callable[[Sequence[str]], bool]]
+
+
+def k_fold_splits(words: Iterable[Union[str, Sequence[str]]], folds=5, seed=0) -> List[Tuple[list, list]]:
+    """Split the words randomly into `folds` parts of (almost) the same size, and return for each part
+    the words of the other parts (for training) and the words of the part (for testing).
+
+    :param words: iterable of words or of sequences of symbols
+    :param folds: number of parts (default: 5)
+    :param seed: random seed (default: 0)
+    :return: list of (training words, test words) pairs
+    """
+    words = list(words)
+    assert 2 <= folds <= len(words)
+
+    indices = list(range(len(words)))
+    random.Random(seed).shuffle(indices)
+    parts = [sorted(indices[fold::folds]) for fold in range(folds)]
+    return [([words[i] for other in parts if other is not part for i in other], [words[i] for i in part])
+            for part in parts]
+
+
+def sample_words(m: FSM, n: int, seed=0, max_length=1000) -> List[Tuple[str, ...]]:
+    """Sample words accepted by an FSM, by random walks from its initial state: at each state, the walk takes one of
+    the outgoing transitions at random, or stops there (if it is a final state), with the same probability.
+    The walks that reach a state without outgoing transitions (that is not final) or get longer than `max_length`
+    are discarded, so that fewer than `n` words may be returned (after `10 * n` walks at most).
+
+    :param m: FSM
+    :param n: number of words
+    :param seed: random seed (default: 0)
+    :param max_length: maximum length of the words (default: 1000)
+    :return: list of words (as tuples of symbols)
+    """
+    rng = random.Random(seed)
+
+    # the outgoing transitions of each state, sorted so that the walks only depend on the seed
+    edges = dict()
+
+    def outgoing(state):
+        if state not in edges:
+            edges[state] = sorted((symbol, next_state) for symbol, next_states in m.outgoing(state).items()
+                                  for next_state in next_states)
+        return edges[state]
+
+    words = []
+    for _ in range(10 * n):
+        if len(words) == n:
+            break
+        state = m.initial_state
+        word = []
+        while True:
+            transitions = outgoing(state)
+            if state in m.final_states and rng.randrange(len(transitions) + 1) == len(transitions):
+                words.append(tuple(word))
+                break
+            if not transitions or len(word) >= max_length:
+                break
+            symbol, state = rng.choice(transitions)
+            word.append(symbol)
+    return words
+
+
+def _tokenize(word: Union[str, Sequence[str]], sep) -> Tuple[str, ...]:
+    return tuple(word.split(sep) if isinstance(word, str) else word)
+
+
+def _accuracy(m: FSM, training_words: List[Tuple[str, ...]], test_words: List[Tuple[str, ...]],
+              ground_truth: Optional[GroundTruth], samples: int, seed, max_length) -> dict:
+    """Return the recall (the rate of the test words accepted by the model) and the precision (the rate of the words
+    sampled from the model that are correct, i.e., accepted by the ground truth, or in the training words if none).
+    """
+    accepted = m.is_accepted_batch([(initial_symbol,) + word + (final_symbol,) for word in test_words])[0]
+    recall = sum(accepted) / len(accepted) if accepted else 0.0
+
+    # the sampled words start with the special initial symbol and end with the special final symbol
+    sampled = [word[1:-1] for word in sample_words(m, samples, seed=seed, max_length=max_length + 2)]
+    if ground_truth is None:
+        training_words = set(training_words)
+        correct = [word in training_words for word in sampled]
+    elif isinstance(ground_truth, FSM):
+        correct = ground_truth.is_accepted_batch(sampled)[0]
+    else:
+        correct = [ground_truth(word) for word in sampled]
+    precision = sum(correct) / len(correct) if correct else 0.0
+
+    return {'recall': recall,
+            'precision': precision,
+            'f1': 2 * recall * precision / (recall + precision) if recall + precision else 0.0,
+            'samples': len(sampled)}
+
+
+# the splits and the options of the evaluation, set once in each worker process
+_worker_args: Optional[tuple] = None
+
+
+def _init_worker(*args):
+    global _worker_args
+    _worker_args = args
+
+
+def _evaluate_fold(fold: int, k: int, splits, ground_truth, samples, seed, max_length) -> dict:
+    training_words, test_words = splits[fold]
+
+    start = time.perf_counter()
+    m = ktail(training_words, k)
+    inference_time = time.perf_counter() - start
+
+    result = {'k': k, 'fold': fold, **fsm_counters(m), 'time': inference_time}
+    result.update(_accuracy(m, training_words, test_words, ground_truth, samples, f'{seed}/{fold}/{k}', max_length))
+    return result
+
+
+def _evaluate_fold_in_worker(task: Tuple[int, int]) -> dict:
+    return _evaluate_fold(*task, *_worker_args)
+
+
+def evaluate(words: Iterable[Union[str, Sequence[str]]], ks: Iterable[int], folds=5, ground_truth: GroundTruth = None,
+             samples=1000, sep=' ', seed=0, max_length=None, workers=None) -> Dict[int, dict]:
+    """Evaluate the accuracy of the models inferred by k-tail for several values of k, by k-fold cross-validation.
+
+    For each fold (see `k_fold_splits`) and each k, a model is inferred from the training words, and its recall
+    is the rate of the (held-out) test words that it accepts. Its precision is estimated by sampling words from it
+    (see `sample_words`) and checking them against the ground truth, or against the training words (i.e., the PTA)
+    if the ground truth is unknown, which is then a lower bound of the precision.
+
+    :param words: iterable of words or of sequences of symbols
+    :param ks: values of the parameter k
+    :param folds: number of folds (default: 5)
+    :param ground_truth: FSM accepting the correct words (without the special initial and final symbols),
+                         or a function telling if a word (sequence of symbols) is correct (picklable if `workers`
+                         is given) (default: None, only the training words)
+    :param samples: number of words sampled from each model to estimate its precision (default: 1000)
+    :param sep: separator between symbols in the words (default: whitespace)
+    :param seed: random seed of the splits and the samples (default: 0)
+    :param max_length: maximum length of the sampled words (default: None, twice the length of the longest word)
+    :param workers: number of worker processes running the folds and the values of k in parallel
+                    (default: None, no worker processes)
+    :return: dictionary from each k to the mean recall, precision, F1 score, number of states and transitions,
+             and inference time (in seconds) over the folds, and the results of each fold (in 'folds')
+    """
+    ks = sorted(set(ks))
+    assert ks and min(ks) > 0
+
+    words = [_tokenize(word, sep) for word in words]
+    splits = k_fold_splits(words, folds=folds, seed=seed)
+    if max_length is None:
+        max_length = 2 * max(map(len, words))
+    args = (splits, ground_truth, samples, seed, max_length)
+    tasks = [(fold, k) for k in ks for fold in range(folds)]
+
+    if workers is None or workers <= 1:
+        results = [_evaluate_fold(*task, *args) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=args) as executor:
+            results = list(executor.map(_evaluate_fold_in_worker, tasks))
+
+    report = dict()
+    for k in ks:
+        fold_results = [result for result in results if result['k'] == k]
+        report[k] = {key: sum(result[key] for result in fold_results) / len(fold_results)
+                     for key in ('recall', 'precision', 'f1', 'states', 'transitions', 'time')}
+        report[k]['folds'] = fold_results
+    return report
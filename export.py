@@ -0,0 +1,177 @@
+import json
+import os
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Set, TextIO, Tuple
+
+from finite_state_automaton import FiniteStateAutomaton as FSM
+
+COLLAPSED = '...'  # the node standing for all the states left out of the output
+
+
+@contextmanager
+def _open(out):
+    if isinstance(out, (str, os.PathLike)):
+        with open(out, 'w') as f:
+            yield f
+    else:
+        yield out
+
+
+def _shorten(label: str, max_label_length) -> str:
+    if max_label_length is not None and len(label) > max_label_length:
+        return label[:max(max_label_length - 3, 0)] + '...'
+    return label
+
+
+def _traffic(m: FSM) -> Dict[str, int]:
+    """Return the traffic of each state, i.e., the number of traces going through its transitions
+    (or the number of its incoming and outgoing transitions, if the numbers of traces are unknown).
+    """
+    traffic = dict.fromkeys(m.states, 0)
+    counts = getattr(m, 'transition_counts', None)
+    if counts:
+        for (state, _, next_state), count in counts.items():
+            traffic[state] = traffic.get(state, 0) + count
+            traffic[next_state] = traffic.get(next_state, 0) + count
+    else:
+        for state in m.states:
+            for next_states in m.outgoing(state).values():
+                traffic[state] += len(next_states)
+                for next_state in next_states:
+                    traffic[next_state] = traffic.get(next_state, 0) + 1
+    return traffic
+
+
+def _select_states(m: FSM, max_states=None, max_depth=None) -> List[str]:
+    """Return the states to output (in breadth-first order from the initial state, followed by unreachable states):
+    those within `max_depth` transitions from the initial state and, among them, the `max_states` states
+    with the most traffic (the initial state is always selected).
+    """
+    depths = {m.initial_state: 0}
+    queue = deque([m.initial_state])
+    while queue:
+        state = queue.popleft()
+        if max_depth is not None and depths[state] >= max_depth:
+            continue
+        for next_states in m.outgoing(state).values():
+            for next_state in next_states:
+                if next_state not in depths:
+                    depths[next_state] = depths[state] + 1
+                    queue.append(next_state)
+
+    states = list(depths.keys())
+    if max_depth is None:
+        states += sorted(set(m.states) - set(depths.keys()))
+
+    if max_states is not None and len(states) > max_states:
+        traffic = _traffic(m)
+        top = set(sorted(states[1:], key=lambda state: -traffic.get(state, 0))[:max(max_states - 1, 0)])
+        states = [state for i, state in enumerate(states) if i == 0 or state in top]
+    return states
+
+
+def _merged_edges(m: FSM, state: str, selected: Set[str], collapse: bool) -> Dict[str, List[Tuple[str, int]]]:
+    """Return the outgoing transitions of a state merged by their next states (next state -> [(symbol, count)]),
+    with the transitions to the states not selected merged into the collapsed node (or dropped),
+    where the transitions with the same symbol to the collapsed node are merged too (adding up their counts).
+    """
+    counts = getattr(m, 'transition_counts', None) or {}
+    edges = dict()  # next state -> symbol -> count
+    for symbol, next_states in sorted(m.outgoing(state).items()):
+        for next_state in next_states:
+            if next_state not in selected:
+                if not collapse:
+                    continue
+                target = COLLAPSED
+            else:
+                target = next_state
+            symbols = edges.setdefault(target, dict())
+            count, previous = counts.get((state, symbol, next_state)), symbols.get(symbol)
+            symbols[symbol] = previous if count is None else count + (previous or 0)
+    return {target: list(symbols.items()) for target, symbols in edges.items()}
+
+
+def _edge_label(symbols: List[Tuple[str, int]]) -> str:
+    return ', '.join(symbol if count is None else f'{symbol} ({count})' for symbol, count in symbols)
+
+
+def _dot_id(name: str) -> str:
+    return '"' + name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def write_dot(m: FSM, out, max_states=None, max_depth=None, collapse=True, max_label_length=40):
+    """Write an FSM in the DOT format of Graphviz, directly to a file or a stream (without rendering or viewing it).
+    The parallel transitions between two states are merged into a single edge labelled with all of their symbols
+    (and the numbers of traces, if known). For large FSMs, the output can be limited to the states within a given
+    depth from the initial state and/or the states with the most traffic, and long state names can be shortened.
+
+    :param m: FSM
+    :param out: path to the file or a text stream
+    :param max_states: maximum number of states to output (default: None, no limit)
+    :param max_depth: maximum depth (from the initial state) of the states to output (default: None, no limit)
+    :param collapse: whether to show the transitions to the left-out states as going to a single '...' node,
+                     instead of leaving them out (default: True)
+    :param max_label_length: maximum length of the state labels (default: 40, None for no limit)
+    """
+    states = _select_states(m, max_states=max_states, max_depth=max_depth)
+    selected = set(states)
+    ids = {state: f'n{i}' for i, state in enumerate(states)}
+    ids[COLLAPSED] = 'collapsed'
+
+    with _open(out) as f:
+        f.write('digraph finite_state_machine {\n')
+        f.write('\trankdir=LR\n')
+
+        # add a dummy state to make the initial state an actual state
+        f.write('\tstart [shape=point]\n')
+        f.write(f'\tstart -> {ids[m.initial_state]}\n')
+
+        collapsed = False
+        for state in states:
+            shape = 'doublecircle' if state in m.final_states else 'circle'
+            f.write(f'\t{ids[state]} [label={_dot_id(_shorten(state, max_label_length))} shape={shape}]\n')
+            for next_state, symbols in _merged_edges(m, state, selected, collapse).items():
+                collapsed |= next_state == COLLAPSED
+                f.write(f'\t{ids[state]} -> {ids[next_state]} [label={_dot_id(_edge_label(symbols))}]\n')
+
+        if collapsed:
+            f.write(f'\t{ids[COLLAPSED]} [label="{COLLAPSED}" shape=none]\n')
+        f.write('}\n')
+
+
+def write_json(m: FSM, out, max_states=None, max_depth=None, collapse=True, max_label_length=None):
+    """Write an FSM as a JSON graph (nodes and edges), directly to a file or a stream, one node or edge at a time.
+    The options are the same as `write_dot`, where the target of the collapsed transitions is '...'.
+
+    :param m: FSM
+    :param out: path to the file or a text stream
+    :param max_states: maximum number of states to output (default: None, no limit)
+    :param max_depth: maximum depth (from the initial state) of the states to output (default: None, no limit)
+    :param collapse: whether to show the transitions to the left-out states as going to a single '...' node,
+                     instead of leaving them out (default: True)
+    :param max_label_length: maximum length of the state labels (default: None, no limit)
+    """
+    states = _select_states(m, max_states=max_states, max_depth=max_depth)
+    selected = set(states)
+
+    def write_items(f: TextIO, items):
+        for i, item in enumerate(items):
+            f.write(',\n' if i else '\n')
+            f.write(json.dumps(item))
+
+    def edges():
+        for state in states:
+            for next_state, symbols in _merged_edges(m, state, selected, collapse).items():
+                edge = {'source': state, 'target': next_state, 'symbols': [symbol for symbol, _ in symbols]}
+                if any(count is not None for _, count in symbols):
+                    edge['counts'] = [count for _, count in symbols]
+                yield edge
+
+    with _open(out) as f:
+        f.write(f'{{"initial_state": {json.dumps(m.initial_state)},\n"nodes": [')
+        write_items(f, ({'id': state, 'label': _shorten(state, max_label_length), 'final': state in m.final_states}
+                        for state in states))
+        f.write('],\n"edges": [')
+        write_items(f, edges())
+        f.write(']}\n')
@@ -0,0 +1,237 @@
+import dbm
+from itertools import islice
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from ktail import final_symbol, initial_symbol
+
+PADDING = -1  # symbol id filling up the windows after the special final symbol
+EMPTY = 0  # fingerprint of the empty future (of the special final state)
+
+# per lane (of 64 bits): the seed of the hashes of the k-grams, and the multiplier of the symbol ids
+SEEDS = (0x9e3779b97f4a7c15, 0x6a09e667f3bcc909)
+MULTIPLIERS = (0xd6e8feb86659fd93, 0xa0761d6478bd642f)
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """The finalizer of SplitMix64, a bijection on 64-bit integers that mixes all of their bits."""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return x ^ (x >> np.uint64(31))
+
+
+def _extend(hashes: np.ndarray, lane: int, symbol_ids: np.ndarray) -> np.ndarray:
+    """Return the hashes of the k-grams extended by one symbol, given the hashes of the k-grams (in a lane)."""
+    return _mix(hashes ^ ((symbol_ids.astype(np.uint64) + np.uint64(2)) * np.uint64(MULTIPLIERS[lane])))
+
+
+def _kgram_hashes(windows: np.ndarray) -> Iterator[Tuple[np.ndarray, List[np.ndarray]]]:
+    """Return the hashes (in both lanes) of the k-grams of the given windows of symbol ids, built incrementally:
+    for each i from 1 to k, which windows have an i-gram (i.e., no padding in their first i symbols),
+    and the hashes of the i-grams of the windows (where the hashes of the windows without an i-gram are meaningless).
+    """
+    hashes = [np.full(len(windows), seed, dtype=np.uint64) for seed in SEEDS]
+    alive = np.ones(len(windows), dtype=bool)
+    for i in range(windows.shape[1]):
+        alive &= windows[:, i] != PADDING
+        hashes = [_extend(hashes[lane], lane, windows[:, i]) for lane in range(2)]
+        yield alive, hashes
+
+
+def _to_int(lanes) -> List[int]:
+    """Return the 128-bit fingerprints (as Python integers) of the given pairs of 64-bit lanes."""
+    return [(high << 64) | low for high, low in zip(lanes[0].tolist(), lanes[1].tolist())]
+
+
+class FutureFingerprints:
+    """The future map of k-tail (see `ktail.k_future_mapping`), where each future is represented by a fingerprint.
+
+    The fingerprint of a future (i.e., a set of k-grams) is a 128-bit integer: the sum of the hashes of its k-grams,
+    which are built incrementally (one symbol at a time) from the integer ids of their symbols.
+    Therefore, equal futures have equal fingerprints, and different futures have different fingerprints
+    with a very high probability (which can be checked by `fingerprint_future_mapping` with `verify`).
+
+    Instead of the futures themselves, the window of symbol ids of the first state with each future is kept
+    (in memory or spilled to a file), from which the future can be materialized when needed (see `future`).
+    """
+
+    def __init__(self, k: int, spill=None):
+        """
+        :param k: maximum length of the future sequences
+        :param spill: path to a file where the windows of the futures are kept, instead of in memory
+                      (default: None, in memory)
+        """
+        self.k = k
+        self.future_map: Dict[int, Set[int]] = dict()  # future map (of fingerprints)
+        self.labels: Dict[int, str] = dict()  # fingerprint -> first symbol of the k-grams of the future
+        self.symbols: List[str] = [final_symbol, initial_symbol]  # symbol id -> symbol
+        self.initial_future = EMPTY  # fingerprint of the future of the initial state
+        self._initial_windows: Set[Tuple[int, ...]] = set()  # the distinct k-windows of the initial state
+        self._initial_targets: Set[int] = set()  # the futures of the first states of the chains
+        self._windows = dict() if spill is None else dbm.open(str(spill), 'n')  # fingerprint -> window (bytes)
+
+    def future(self, fingerprint: int) -> FrozenSet[Tuple[str, ...]]:
+        """Return the future (i.e., the set of k-grams) of a given fingerprint.
+
+        :param fingerprint: fingerprint
+        :return: future
+        """
+        if fingerprint == EMPTY:
+            return frozenset()
+        if fingerprint == self.initial_future:
+            windows = self._initial_windows
+        else:
+            windows = [tuple(np.frombuffer(self._windows[self._key(fingerprint)], dtype=np.int32).tolist())]
+
+        future = set()
+        for window in windows:
+            window = tuple(self.symbols[symbol_id] for symbol_id in window if symbol_id != PADDING)
+            future.update(window[:i] for i in range(1, len(window) + 1))
+        return frozenset(future)
+
+    def materialize(self) -> dict:
+        """Return the future map with the futures themselves (i.e., the same as `ktail.k_future_mapping`)."""
+        futures = dict()
+
+        def future(fingerprint):
+            if fingerprint not in futures:
+                futures[fingerprint] = self.future(fingerprint)
+            return futures[fingerprint]
+
+        return {future(future_src): {future(future_dst) for future_dst in futures_dst}
+                for future_src, futures_dst in self.future_map.items()}
+
+    def close(self):
+        """Close the file of the spilled windows (if any)."""
+        if not isinstance(self._windows, dict):
+            self._windows.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _key(fingerprint: int) -> bytes:
+        return fingerprint.to_bytes(16, 'little')
+
+    def _add_windows(self, fingerprints: List[int], windows: np.ndarray, verify: bool):
+        for fingerprint, window in zip(fingerprints, windows):
+            key = self._key(fingerprint)
+            window = window.tobytes()
+            stored = self._windows.get(key)
+            if stored is None:
+                if verify and fingerprint == EMPTY:
+                    raise ValueError('fingerprint collision of a future with the empty future')
+                self._windows[key] = window
+            elif verify and stored != window:
+                raise ValueError(f'fingerprint collision of different futures ({fingerprint:#034x})')
+
+    def _add_shard(self, encoded: np.ndarray, first_positions: np.ndarray, verify: bool):
+        """Add the futures of the words in a shard, encoded as in `kgram_engine.kgram_future_mapping`
+        (followed by k more paddings, so that all the positions have a complete window).
+        """
+        k = self.k
+        n = len(encoded) - k
+
+        # the fingerprints of the futures of all positions, summing the hashes of the k-grams starting from them
+        windows = np.lib.stride_tricks.sliding_window_view(encoded, k)[:n]
+        fingerprints = np.zeros((n, 2), dtype=np.uint64)
+        for alive, hashes in _kgram_hashes(windows):
+            for lane in range(2):
+                fingerprints[:, lane] += np.where(alive, hashes[lane], np.uint64(0))
+
+        # the futures of the positions except the paddings, each with the window of its first position
+        # (where the windows of all positions with the same fingerprint must be the same if they are verified)
+        positions = np.flatnonzero(encoded[:n] != PADDING)
+        sources, first, inverse = np.unique(fingerprints[positions], axis=0, return_index=True, return_inverse=True)
+        if verify and not np.array_equal(windows[positions[first]][inverse.reshape(-1)], windows[positions]):
+            raise ValueError('fingerprint collision of different futures')
+        sources = _to_int(sources.T)
+        self._add_windows(sources, windows[positions[first]], verify)
+        for source, label in zip(sources, encoded[positions[first]].tolist()):
+            self.labels[source] = self.symbols[label]
+
+        # the transitions of the chains, from the future of each position to the future of the next one
+        pairs = np.unique(np.concatenate([fingerprints[positions], fingerprints[positions + 1]], axis=1), axis=0)
+        for source, target in zip(_to_int(pairs[:, :2].T), _to_int(pairs[:, 2:].T)):
+            self.future_map.setdefault(source, set()).add(target)
+
+        # the windows of the initial state are '$' followed by the first k-1 symbols of the words
+        initial_windows = np.concatenate([np.full((len(first_positions), 1), self.symbols.index(initial_symbol),
+                                                  dtype=np.int32), windows[first_positions, :k - 1]], axis=1)
+        self._initial_windows.update(map(tuple, np.unique(initial_windows, axis=0).tolist()))
+        self._initial_targets.update(_to_int(fingerprints[first_positions].T))
+
+    def _add_initial_future(self, verify: bool):
+        """Add the future of the initial state, i.e., the union of the futures of all of its windows."""
+        windows = np.array(sorted(self._initial_windows), dtype=np.int32)
+
+        # the fingerprint of the union sums the hashes of the distinct k-grams of all the windows
+        kgrams = set()
+        for alive, hashes in _kgram_hashes(windows):
+            kgrams.update(zip(hashes[0][alive].tolist(), hashes[1][alive].tolist()))
+        self.initial_future = (sum(high for high, _ in kgrams) % (1 << 64)) << 64 | sum(low for _, low in kgrams) % (1 << 64)
+
+        if verify and self._key(self.initial_future) in self._windows:
+            raise ValueError(f'fingerprint collision of different futures ({self.initial_future:#034x})')
+        self.future_map[self.initial_future] = self._initial_targets
+        self.labels[self.initial_future] = initial_symbol
+
+
+def fingerprint_future_mapping(words: Iterable[Union[str, Sequence[str]]], k: int, sep=' ', verify=False, spill=None,
+                               shard_size=10000) -> FutureFingerprints:
+    """Return the future map of the PTA of the given words (see `k_future_mapping`), where each future is represented
+    by a 128-bit fingerprint (see `FutureFingerprints`), without generating the PTA.
+
+    The words are read and encoded as in `kgram_engine.kgram_future_mapping`, one shard (of `shard_size` words)
+    at a time, so that only the fingerprints (and one window of symbol ids for each of them) are kept in memory,
+    rather than the futures, whose sizes grow quadratically with k.
+
+    :param words: iterable of words or of sequences of symbols
+    :param k: maximum length of the future sequences
+    :param sep: separator between symbols in the words (default: whitespace)
+    :param verify: whether to check that all the states with the same fingerprint have the same future,
+                   raising a ValueError otherwise (default: False)
+    :param spill: path to a file where the windows of the futures are kept, instead of in memory
+                  (default: None, in memory)
+    :param shard_size: number of words encoded at once
+    :return: future map of fingerprints
+    """
+    assert k > 0
+
+    fingerprints = FutureFingerprints(k, spill=spill)
+    symbol_ids = {symbol: i for i, symbol in enumerate(fingerprints.symbols)}
+    padding = [PADDING] * k
+
+    words = iter(words)
+    while True:
+        shard = list(islice(words, shard_size))
+        if not shard:
+            break
+
+        # encode the words, remembering the positions of their first symbols
+        encoded = []
+        first_positions = []
+        for word in shard:
+            if isinstance(word, str):
+                word = word.split(sep=sep)
+            assert len(word) > 0
+            first_positions.append(len(encoded))
+            for symbol in word:
+                symbol_id = symbol_ids.get(symbol)
+                if symbol_id is None:
+                    symbol_id = symbol_ids[symbol] = len(fingerprints.symbols)
+                    fingerprints.symbols.append(symbol)
+                encoded.append(symbol_id)
+            encoded.append(symbol_ids[final_symbol])
+            encoded.extend(padding)
+        encoded.extend(padding)
+
+        fingerprints._add_shard(np.array(encoded, dtype=np.int32), np.array(first_positions, dtype=np.int64), verify)
+
+    if fingerprints._initial_windows:
+        fingerprints._add_initial_future(verify)
+    return fingerprints
@@ -1,4 +1,65 @@
-from typing import Set, Dict
+from typing import Set, Dict, List, Optional, Tuple
+
+
+class TransitionTable(dict):
+    """A dictionary (state, symbol) -> set of next states, which keeps an index of the outgoing transitions
+    of each state (state -> {symbol -> set of next states}) in sync with its items.
+    The index shares the sets of next states with the dictionary, so that adding states to them in place
+    (e.g., `transitions.setdefault((state, symbol), set()).add(next_state)`) also updates the index.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self.outgoing = dict()
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, key, next_states):
+        super().__setitem__(key, next_states)
+        state, symbol = key
+        self.outgoing.setdefault(state, dict())[symbol] = next_states
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._unindex(key)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        # rebuild the index when unpickled, rather than pickling it separately from the items
+        return self.__class__, (dict(self),)
+
+    def _unindex(self, key):
+        state, symbol = key
+        del self.outgoing[state][symbol]
+        if not self.outgoing[state]:
+            del self.outgoing[state]
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        if key not in self:
+            return super().pop(key, *default)
+        next_states = super().pop(key)
+        self._unindex(key)
+        return next_states
+
+    def popitem(self):
+        key, next_states = super().popitem()
+        self._unindex(key)
+        return key, next_states
+
+    def clear(self):
+        super().clear()
+        self.outgoing.clear()
+
+    def update(self, *args, **kwargs):
+        for key, next_states in dict(*args, **kwargs).items():
+            self[key] = next_states
 
 
 class FiniteStateAutomaton:
@@ -6,7 +67,8 @@ class FiniteStateAutomaton:
     states: Set[str]
     initial_state: str
     final_states: Set[str]
-    transitions: Dict  # (state, symbol) -> Set of states
+    transition_counts: Dict[Tuple[str, str, str], int]  # (state, symbol, next state) -> number of traces
+    final_counts: Dict[str, int]  # final state -> number of traces
 
     def __init__(self):
         self.alphabet = set()
@@ -14,6 +76,67 @@ class FiniteStateAutomaton:
         self.final_states = set()
         self.transitions = dict()
         self.initial_state = ''
+        self.transition_counts = dict()
+        self.final_counts = dict()
+
+    @property
+    def transitions(self) -> TransitionTable:
+        """(state, symbol) -> Set of states.
+
+        The outgoing-edge index is kept in sync with the transitions however they are modified
+        (see `TransitionTable`).
+        """
+        return self._transitions
+
+    @transitions.setter
+    def transitions(self, transitions: Dict):
+        # (re)build the outgoing-edge index (the sets of next states are shared with the given transitions)
+        self._transitions = transitions if type(transitions) is TransitionTable else TransitionTable(transitions)
+
+    def add_transition(self, state, symbol, next_state, count=None):
+        """Add a transition from a state to a next state with a given symbol.
+
+        :param state: current state
+        :param symbol: symbol of the transition
+        :param next_state: next state
+        :param count: number of traces taking the transition, added to its count (default: None, not counted)
+        """
+        next_states = self._transitions.get((state, symbol))
+        if next_states is None:
+            next_states = self._transitions[(state, symbol)] = set()
+        next_states.add(next_state)
+        if count is not None:
+            key = (state, symbol, next_state)
+            self.transition_counts[key] = self.transition_counts.get(key, 0) + count
+
+    def remove_transition(self, state, symbol, next_state):
+        """Remove a transition from a state to a next state with a given symbol.
+
+        :param state: current state
+        :param symbol: symbol of the transition
+        :param next_state: next state
+        """
+        next_states = self._transitions[(state, symbol)]
+        next_states.remove(next_state)
+        self.transition_counts.pop((state, symbol, next_state), None)
+        if not next_states:
+            del self._transitions[(state, symbol)]
+
+    def outgoing(self, state) -> Dict[str, Set[str]]:
+        """Return the outgoing transitions of a given state (not to be modified).
+
+        :param state: current state
+        :return: a dictionary from each enabled symbol to its set of next states
+        """
+        return self._transitions.outgoing.get(state, {})
+
+    def enabled_symbols(self, state):
+        """Return all symbols that can be read from a given state.
+
+        :param state: current state
+        :return: a set of symbols
+        """
+        return set(self._transitions.outgoing.get(state, {}).keys())
 
     def next_states(self, state):
         """Return all possible next states from a given state.
@@ -22,9 +145,8 @@ class FiniteStateAutomaton:
         :return: a set of next states
         """
         next_states = set()
-        for (s, symbol) in self.transitions.keys():
-            if s == state:
-                next_states |= self.transitions[(s, symbol)]
+        for states in self._transitions.outgoing.get(state, {}).values():
+            next_states |= states
         return next_states
 
     def is_accepted(self, word, sep=' '):
@@ -42,12 +164,63 @@ class FiniteStateAutomaton:
         for symbol in word:
             next_states = set()
             for state in current_states:
-                if (state, symbol) in self.transitions.keys():
-                    next_states |= self.transitions[(state, symbol)]
+                next_states |= self.outgoing(state).get(symbol, set())
             current_states = next_states
         return any(state in self.final_states for state in current_states)
 
-    def draw(self, name='fsm'):
+    def is_accepted_batch(self, words, sep=' ', workers=None) -> Tuple[List[bool], List[Optional[int]]]:
+        """Check if each of the given words is accepted by the FSM.
+        The FSM is determinized lazily (only the DFA states reached by the words are built, once per call),
+        and the words are checked in lexicographic order to share the work for their common prefixes.
+
+        :param words: iterable of words or of sequences of symbols
+        :param sep: separator between symbols in the words
+        :param workers: number of worker processes (default: None, no worker processes)
+        :return: a list of booleans (whether each word is accepted) and a list of rejection positions,
+                 i.e., the position of the first symbol that cannot be read, the length of the word
+                 if the whole word is read but does not end in a final state, or None if the word is accepted
+        """
+        from dfa import accepts_batch
+        return accepts_batch(self, words, sep=sep, workers=workers)
+
+    def transition_probabilities(self) -> Dict[Tuple[str, str, str], float]:
+        """Return the probability of each transition, i.e., its count divided by the total count of the transitions
+        leaving its state and of the traces ending there (see `transition_counts` and `final_counts`).
+        The transitions and final states without a count count as one trace (i.e., uniform probabilities).
+
+        :return: a dictionary from each transition (state, symbol, next state) to its probability
+        """
+        from likelihood import transition_probabilities
+        return transition_probabilities(self)
+
+    def log_likelihood_batch(self, words, sep=' ') -> List[float]:
+        """Return the log-likelihood of each of the given words under the transition probabilities of the FSM
+        (see `transition_probabilities`), i.e., the natural logarithm of the total probability of the paths
+        reading the word and ending in a final state (stopping there), or -inf if the word is not accepted.
+        The words are scored in lexicographic order to share the work for their common prefixes.
+
+        :param words: iterable of words or of sequences of symbols
+        :param sep: separator between symbols in the words
+        :return: a list of log-likelihoods
+        """
+        from likelihood import log_likelihood_batch
+        return log_likelihood_batch(self, words, sep=sep)
+
+    def __setstate__(self, state):
+        # the FSMs pickled with plain dictionaries of transitions (and a separate index) get a transition table,
+        # and those pickled with a cached lazy DFA drop it
+        state.pop('_outgoing', None)
+        state.pop('_dfa', None)
+        self.__dict__.update(state)
+        self.transitions = self._transitions
+
+    def draw(self, name='fsm', view=True):
+        """Draw the FSM with Graphviz and open it in a viewer (or only save the DOT source if `view` is False).
+        For large FSMs or headless environments, see `export.write_dot`.
+
+        :param name: name of the output files (followed by a timestamp)
+        :param view: whether to render the FSM and open it in a viewer (default: True)
+        """
         from datetime import datetime
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         name = f'{name}_{timestamp}'
@@ -69,7 +242,10 @@ class FiniteStateAutomaton:
             for next_state in next_states:
                 dot.edge(state, next_state, label=symbol)
 
-        dot.view(f'{name}.dot')
+        if view:
+            dot.view(f'{name}.dot')
+        else:
+            dot.save()
 
     def __str__(self):
         return f'Alphabet: {self.alphabet}\n' \
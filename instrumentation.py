@@ -0,0 +1,100 @@
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Union
+
+from compact_automaton import CompactAutomaton
+from finite_state_automaton import FiniteStateAutomaton as FSM
+
+# a metrics callback receives the name of a stage and its report (wall time, peak memory if traced, and counters)
+MetricsCallback = Callable[[str, dict], None]
+
+
+@contextmanager
+def measure_stage(callback: MetricsCallback, stage: str, trace_memory=False):
+    """Measure the wall time (and the peak memory if needed) of a stage, and report them with the counters set by
+    the stage. The peak memory is the peak of the memory allocated during the stage (measured by `tracemalloc`,
+    which is started for the stage if it is not tracing already). Since tracing the memory slows down the stage
+    several times, the wall time is only accurate without it.
+
+    :param callback: metrics callback
+    :param stage: name of the stage
+    :param trace_memory: whether to measure the peak memory (default: False)
+    :return: a dictionary for the counters of the stage, to be filled in the `with` block
+    """
+    counters = dict()
+    if not trace_memory:
+        time_start = time.perf_counter()
+        yield counters
+        wall_time = time.perf_counter() - time_start
+        callback(stage, dict(wall_time=wall_time, **counters))
+        return
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.start()
+    memory_start = tracemalloc.get_traced_memory()[0]
+    time_start = time.perf_counter()
+
+    try:
+        yield counters
+        wall_time = time.perf_counter() - time_start
+        peak_memory = tracemalloc.get_traced_memory()[1] - memory_start
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    callback(stage, dict(wall_time=wall_time, peak_memory=peak_memory, **counters))
+
+
+def log_metrics(logger: logging.Logger = None, level=logging.INFO) -> MetricsCallback:
+    """Return a metrics callback that logs the report of each stage.
+
+    :param logger: logger (default: None, the logger of this module)
+    :param level: logging level (default: INFO)
+    :return: metrics callback
+    """
+    logger = logger or logging.getLogger(__name__)
+
+    def callback(stage: str, report: dict):
+        logger.log(level, '%s: %s', stage, report)
+
+    return callback
+
+
+def fsm_counters(m: Union[FSM, CompactAutomaton]) -> dict:
+    """Return the numbers of states and transitions (i.e., (state, symbol, next state) triples) of an FSM."""
+    if isinstance(m, CompactAutomaton):
+        return {'states': len(m.state_names), 'transitions': len(m.edge_targets)}
+    return {'states': len(m.states),
+            'transitions': sum(len(next_states) for next_states in m.transitions.values())}
+
+
+def future_counters(futures: Dict[str, frozenset]) -> dict:
+    """Return the counters of the k-futures of the states (see `ktail.k_futures`),
+    including the rate of states whose future was already computed (and shared) for another state.
+    """
+    distinct_futures = set(futures.values())
+    return {'states': len(futures),
+            'distinct_futures': len(distinct_futures),
+            'future_size_histogram': size_histogram(distinct_futures),
+            'future_hit_rate': 1 - len(distinct_futures) / len(futures) if futures else 0.0}
+
+
+def future_map_counters(future_map: dict) -> dict:
+    """Return the counters of a future map (see `ktail.k_future_mapping`)."""
+    distinct_futures = set(future_map.keys()).union(*future_map.values())
+    return {'distinct_futures': len(distinct_futures),
+            'future_size_histogram': size_histogram(distinct_futures),
+            'mappings': sum(len(futures_dst) for futures_dst in future_map.values())}
+
+
+def size_histogram(sets: Iterable[frozenset]) -> Dict[int, int]:
+    """Return the histogram (size -> number of sets) of the sizes of the given sets."""
+    histogram = dict()
+    for s in sets:
+        histogram[len(s)] = histogram.get(len(s), 0) + 1
+    return dict(sorted(histogram.items()))
@@ -0,0 +1,61 @@
+from array import array
+from typing import Iterable, Sequence, Union
+
+import numpy as np
+
+from ktail import final_symbol, initial_symbol, window_future_mapping
+
+PADDING = -1  # symbol id filling up the windows after the special final symbol
+
+
+def kgram_future_mapping(words: Iterable[Union[str, Sequence[str]]], k: int, sep=' ', counts: dict = None) -> dict:
+    """Return the future map of the PTA of the given words (see `k_future_mapping`), without generating the PTA.
+
+    In the PTA, the k-future of each state is determined by the window of the next k events of its word
+    (followed by the special final symbol), and its transition to the next state by the next k+1 events.
+    Therefore, the words are encoded as a single array of integer symbol ids, where each word is followed
+    by the special final symbol and k paddings, and the (k+1)-windows of all positions are taken by a sliding
+    window view and grouped by `np.unique`. Only the distinct windows are decoded to compute the future map.
+
+    :param words: iterable of words or of sequences of symbols
+    :param k: maximum length of the future sequences
+    :param sep: separator between symbols in the words (default: whitespace)
+    :param counts: if given, a dictionary to be filled with the number of traces of each mapping
+                   (future, next future) (see `ktail.k_future_mapping`)
+    :return: future map
+    """
+    assert k > 0
+
+    # encode the words, remembering the positions of their first events
+    symbol_ids = {final_symbol: 0}
+    encoded = array('i')
+    first_positions = array('q')
+    padding = [PADDING] * k
+    for word in words:
+        if isinstance(word, str):
+            word = word.split(sep=sep)
+        assert len(word) > 0
+        first_positions.append(len(encoded))
+        encoded.extend(symbol_ids.setdefault(symbol, len(symbol_ids)) for symbol in word)
+        encoded.append(0)
+        encoded.extend(padding)
+
+    if not first_positions:
+        return dict()
+
+    # the windows starting from a padding do not correspond to any state
+    encoded = np.frombuffer(encoded, dtype=np.int32)
+    windows = np.lib.stride_tricks.sliding_window_view(encoded, k + 1)
+    windows = windows[encoded[:len(windows)] != PADDING]
+    first_windows = np.lib.stride_tricks.sliding_window_view(encoded, k)[np.frombuffer(first_positions, dtype=np.int64)]
+
+    # decode the distinct windows only, with their numbers of occurrences
+    symbols = np.array(list(symbol_ids.keys()) + [None], dtype=object)  # PADDING (-1) is decoded as None
+    windows, window_counts = np.unique(windows, axis=0, return_counts=True)
+    windows = {tuple(symbol for symbol in window if symbol is not None): count
+               for window, count in zip(symbols[windows].tolist(), window_counts.tolist())}
+    first_windows, first_window_counts = np.unique(first_windows, axis=0, return_counts=True)
+    initial_windows = {(initial_symbol,) + tuple(symbol for symbol in window if symbol is not None): count
+                       for window, count in zip(symbols[first_windows].tolist(), first_window_counts.tolist())}
+
+    return window_future_mapping(windows, initial_windows, k, counts=counts)
@@ -1,16 +1,29 @@
+import time
+from array import array
+from collections import deque
+from functools import partial
+
 from natsort import natsorted
+from cache import InferenceCache
+from compact_automaton import CompactAutomaton
+from dfa import minimize as minimize_dfa
 from finite_state_automaton import FiniteStateAutomaton as FSM
-from typing import Set, Tuple, List
+from instrumentation import MetricsCallback, measure_stage, fsm_counters, future_counters, future_map_counters
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+# the version of the inference algorithm, to be increased whenever its results change (see `InferenceCache`)
+ALGORITHM_VERSION = 4
 
 initial_symbol = '$'
 final_symbol = '#'
 
 
-def rename_states(m: FSM, prefix: str = 'q') -> FSM:
+def rename_states(m: FSM, prefix: str = 'q', print_renaming=False) -> FSM:
     """Return a new FSM with all states renamed with the given prefix.
 
     :param m: FSM
     :param prefix: prefix for the new state names
+    :param print_renaming: whether to print the renaming dictionary (default: False)
     :return: a new FSM with renamed states
     """
     # initialise a new FSM
@@ -25,37 +38,48 @@ def rename_states(m: FSM, prefix: str = 'q') -> FSM:
     m_new.states.add(rename[m.initial_state])
     m_new.initial_state = rename[m.initial_state]
 
-    # rename the other states (depth-first ordering)
+    # rename the other states (breadth-first ordering, visiting the transitions in the order of their symbols,
+    # and the next states with the same symbol in natural order), so that the new names are canonical for a DFA
     # NOTE: unreachable states will not be included in the new FSM!
+    # the natural order of all states is computed once, so that the next states of each state are sorted by rank
+    ranked = natsorted(set(m.states).union(*m.transitions.values()))
+    rank = {state: i for i, state in enumerate(ranked)}
     i = 1
-    working_states = [m.initial_state]
+    working_states = deque([m.initial_state])
     while working_states:
-        curr_state = working_states.pop()
-        for next_state in natsorted(m.next_states(curr_state)):
-            if next_state not in rename.keys():
+        curr_state = working_states.popleft()
+        for _, next_rank in sorted((symbol, rank[next_state]) for symbol, next_states in m.outgoing(curr_state).items()
+                                   for next_state in next_states):
+            next_state = ranked[next_rank]
+            if next_state not in rename:
                 rename[next_state] = f'{prefix}{i}'
                 m_new.states.add(rename[next_state])
-                working_states.insert(0, next_state)
+                working_states.append(next_state)
                 i += 1
 
     # update the transitions and final states
     for (curr_state, label), next_states in m.transitions.items():
-        m_new.transitions[(rename[curr_state], label)] = {rename[next_state] for next_state in next_states}
-    m_new.final_states = {rename[state] for state in m.final_states}
-
-    # print rename dictionary
-    print('Renaming dictionary:')
-    for key, value in rename.items():
-        print(key, '->', value)
+        if curr_state in rename:
+            for next_state in next_states:
+                m_new.add_transition(rename[curr_state], label, rename[next_state],
+                                     count=m.transition_counts.get((curr_state, label, next_state)))
+    m_new.final_states = {rename[state] for state in m.final_states if state in rename}
+    m_new.final_counts = {rename[state]: count for state, count in m.final_counts.items() if state in rename}
+
+    # print rename dictionary if needed
+    if print_renaming:
+        print('Renaming dictionary:')
+        for key, value in rename.items():
+            print(key, '->', value)
 
     return m_new
 
 
-def generate_PTA(words: List[str], sep=' ', draw_PTA=False) -> FSM:
+def generate_PTA(words: Iterable[Union[str, Sequence[str]]], sep=' ', draw_PTA=False) -> FSM:
     """Generate a PTA from the given set of words.
     Note that it uses special symbols for the initial and final states.
 
-    :param words: set of words
+    :param words: set of words (or an iterable of words or of sequences of symbols, consumed only once)
     :param sep: separator between symbols in the words (default: whitespace)
     :param draw_PTA: whether to draw the PTA (default: False)
     :return: PTA
@@ -77,8 +101,9 @@ def generate_PTA(words: List[str], sep=' ', draw_PTA=False) -> FSM:
     # For each word, we will create a linear chain of states to accept it.
     state_counter = 1
     for word in words:
-        # convert whitespace-separated word to a sequence of events
-        word = word.split(sep=sep)
+        # convert whitespace-separated word to a sequence of events (unless already done, e.g., by read_traces)
+        if isinstance(word, str):
+            word = word.split(sep=sep)
 
         assert len(word) > 0
         first_state = f's{state_counter}'  # the first state for the given word
@@ -86,7 +111,7 @@ def generate_PTA(words: List[str], sep=' ', draw_PTA=False) -> FSM:
         state_counter += 1
 
         # add the epsilon transition (with the special initial symbol) from the initial state to the first state
-        m.transitions.setdefault((m.initial_state, initial_symbol), set()).add(first_state)
+        m.add_transition(m.initial_state, initial_symbol, first_state)
 
         # append a state and a transition for each symbol in the word
         current_state = first_state
@@ -98,7 +123,7 @@ def generate_PTA(words: List[str], sep=' ', draw_PTA=False) -> FSM:
             m.alphabet.add(symbol)
             next_state = f's{state_counter}'
             m.states.add(next_state)
-            m.transitions.setdefault((current_state, symbol), set()).add(next_state)
+            m.add_transition(current_state, symbol, next_state)
             state_counter += 1
 
             # update the current state
@@ -110,7 +135,40 @@ def generate_PTA(words: List[str], sep=' ', draw_PTA=False) -> FSM:
         special_final_state = '_FINAL_'
         m.states.add(special_final_state)
         m.final_states.add(special_final_state)
-        m.transitions.setdefault((current_state, final_symbol), set()).add(special_final_state)
+        m.add_transition(current_state, final_symbol, special_final_state)
+
+    if draw_PTA:
+        m.draw('PTA')
+
+    return m
+
+
+def generate_prefix_tree(words: Iterable[Union[str, Sequence[str]]], sep=' ', draw_PTA=False, compact=False) \
+        -> Union[FSM, CompactAutomaton]:
+    """Generate a PTA from the given set of words, sharing the common prefixes of the words (i.e., a prefix tree).
+    The number of words taking each transition is recorded in the `transition_counts` of the PTA,
+    and the number of words accepted in the special final state is recorded in its `final_counts`.
+    Note that it uses special symbols for the initial and final states.
+
+    :param words: set of words (or an iterable of words or of sequences of symbols, consumed only once)
+    :param sep: separator between symbols in the words (default: whitespace)
+    :param draw_PTA: whether to draw the PTA (default: False)
+    :param compact: whether to build the PTA directly as a `CompactAutomaton` (with the same states, transitions
+                    and counts), without creating the sets and dictionaries of a `FiniteStateAutomaton`,
+                    which takes several times less memory (default: False)
+    :return: PTA
+    """
+    if compact:
+        m = _generate_compact_prefix_tree(words, sep=sep)
+        if draw_PTA:
+            m.draw('PTA')
+        return m
+
+    m = _new_prefix_tree()
+
+    # For each word, we will follow (and extend if needed) the path of the prefix tree accepting it.
+    for word in words:
+        _add_to_prefix_tree(m, word, sep=sep)
 
     if draw_PTA:
         m.draw('PTA')
@@ -118,6 +176,188 @@ def generate_PTA(words: List[str], sep=' ', draw_PTA=False) -> FSM:
     return m
 
 
+def _generate_compact_prefix_tree(words: Iterable[Union[str, Sequence[str]]], sep=' ') -> CompactAutomaton:
+    """Generate the prefix tree of the given words (see `generate_prefix_tree`) as a `CompactAutomaton`.
+    The tree is built with integer ids only: a dictionary from (state id, symbol id) to the child state id, and
+    the numbers of words reaching and ending in each state, from which the CSR arrays are filled in the end.
+    """
+    # the states are numbered as in generate_prefix_tree: 0 is _INIT_, 1 is _FINAL_, and i > 1 is s{i-1}
+    symbol_ids = {initial_symbol: 0, final_symbol: 1}
+    children = dict()  # (state id << 32 | symbol id) -> child state id
+    reached = array('Q', [0, 0, 0])  # state id -> number of words reaching the state
+    ended = array('Q', [0, 0, 0])  # state id -> number of words ending in the state (before the final symbol)
+    for word in words:
+        if isinstance(word, str):
+            word = word.split(sep=sep)
+        assert len(word) > 0
+
+        state = 2
+        reached[state] += 1
+        for symbol in word:
+            key = state << 32 | symbol_ids.setdefault(symbol, len(symbol_ids))
+            child = children.get(key)
+            if child is None:
+                child = children[key] = len(reached)
+                reached.append(0)
+                ended.append(0)
+            reached[child] += 1
+            state = child
+        ended[state] += 1
+
+    # the edges of each state are sorted by symbol id, so that the final symbol (1) comes first
+    offsets = array('Q', [0])
+    edge_symbols, edge_targets, edge_counts = array('I'), array('I'), array('Q')
+
+    def add_edge(symbol_id, target, count):
+        edge_symbols.append(symbol_id)
+        edge_targets.append(target)
+        edge_counts.append(count)
+
+    if reached[2]:
+        add_edge(0, 2, reached[2])
+    offsets.extend((len(edge_targets), len(edge_targets)))
+    keys = iter(sorted(children))
+    key = next(keys, None)
+    for state in range(2, len(reached)):
+        if ended[state]:
+            add_edge(1, 1, ended[state])
+        while key is not None and key >> 32 == state:
+            child = children[key]
+            add_edge(key & 0xFFFFFFFF, child, reached[child])
+            key = next(keys, None)
+        offsets.append(len(edge_targets))
+
+    state_names = ['_INIT_', '_FINAL_'] + [f's{i}' for i in range(1, len(reached) - 1)]
+    final_flags = bytearray(len(state_names))
+    final_flags[1] = 1
+    return CompactAutomaton(list(symbol_ids), state_names, 0, final_flags, offsets, edge_symbols, edge_targets,
+                            edge_counts=edge_counts, final_counts={'_FINAL_': reached[2]})
+
+
+def _new_prefix_tree() -> FSM:
+    """Return an empty prefix tree with the initial state, the special final state and the root state."""
+
+    # initialise an empty FSM
+    m = FSM()
+
+    # set the initial state and the special final state
+    m.initial_state = '_INIT_'
+    m.states.add(m.initial_state)
+    special_final_state = '_FINAL_'
+    m.states.add(special_final_state)
+    m.final_states.add(special_final_state)
+    m.final_counts[special_final_state] = 0
+
+    # add special symbols to the alphabet
+    assert initial_symbol not in m.alphabet
+    m.alphabet.add(initial_symbol)
+    assert final_symbol not in m.alphabet
+    m.alphabet.add(final_symbol)
+
+    # the root of the prefix tree is the first state for all words
+    m.states.add('s1')
+
+    return m
+
+
+def _add_to_prefix_tree(m: FSM, word: Union[str, Sequence[str]], sep=' ') -> List[Tuple[str, str, str]]:
+    """Add a word to the given prefix tree (see `_new_prefix_tree`) and return the newly created transitions.
+
+    :param m: prefix tree
+    :param word: word (or sequence of symbols)
+    :param sep: separator between symbols in the word (default: whitespace)
+    :return: list of new transitions (state, symbol, next state)
+    """
+    # convert whitespace-separated word to a sequence of events (unless already done, e.g., by read_traces)
+    if isinstance(word, str):
+        word = word.split(sep=sep)
+    assert len(word) > 0
+
+    new_transitions = []
+    current_state = m.initial_state
+    for symbol in [initial_symbol, *word, final_symbol]:
+        next_states = m.outgoing(current_state).get(symbol)
+        if next_states:
+            next_state = next(iter(next_states))
+        else:
+            # the states are numbered in the order of creation (_INIT_ and _FINAL_ excluded)
+            if current_state == m.initial_state:
+                next_state = 's1'
+            elif symbol == final_symbol:
+                next_state = '_FINAL_'
+            else:
+                next_state = f's{len(m.states) - 1}'
+                m.states.add(next_state)
+            m.alphabet.add(symbol)
+            new_transitions.append((current_state, symbol, next_state))
+        m.add_transition(current_state, symbol, next_state, count=1)
+        current_state = next_state
+    m.final_counts[current_state] += 1
+
+    return new_transitions
+
+
+def k_futures(m: FSM, k: int, states=None) -> Dict[str, FrozenSet[Tuple[str, ...]]]:
+    """Return the k-futures of the given states, computed bottom-up (dynamic programming).
+    Level j futures are built once for all states from the level j-1 futures of their successors,
+    so that each state's futures are computed only once and shared with its predecessors.
+
+    :param m: FSM
+    :param k: maximum length of the future sequences
+    :param states: states whose futures are needed (default: all states of the FSM)
+    :return: dictionary from a state to its set of k-sequences (future event sequences with length up to k)
+    """
+    futures = None
+    for futures in k_future_levels(m, k, states=states):
+        pass
+    return futures
+
+
+def k_future_levels(m: FSM, k: int, states=None) -> Iterator[Dict[str, FrozenSet[Tuple[str, ...]]]]:
+    """Return the j-futures of the given states for each j from 1 to k (see `k_futures`), one level at a time.
+
+    :param m: FSM
+    :param k: maximum length of the future sequences
+    :param states: states whose futures are needed (default: all states of the FSM)
+    :return: iterator over the dictionaries from a state to its set of j-sequences, for j = 1, ..., k
+    """
+    assert k > 0
+
+    # only the states reachable within k-1 steps from the given states are relevant
+    if states is None:
+        relevant = set(m.states) | {state for (state, _) in m.transitions.keys()}
+        relevant.update(*m.transitions.values())
+    else:
+        relevant = set(states)
+        frontier = relevant
+        for _ in range(k - 1):
+            frontier = {next_state for state in frontier for next_state in m.next_states(state)} - relevant
+            relevant |= frontier
+
+    # level 1: the symbols enabled in each state
+    # note that equal futures are interned (i.e., shared by all states having them) at each level
+    empty = frozenset()
+    interned = dict()
+    first = {state: _intern(interned, frozenset((symbol,) for symbol in m.outgoing(state))) for state in relevant}
+    yield first
+
+    # level j: the enabled symbols, plus each enabled symbol followed by a (j-1)-future of its target
+    futures = first
+    for _ in range(k - 1):
+        interned = dict()
+        futures = {state: _intern(interned, first[state].union(*({(symbol,) + suffix
+                                                                  for suffix in futures.get(next_state, empty)}
+                                                                 for symbol, next_states in m.outgoing(state).items()
+                                                                 for next_state in next_states)))
+                   for state in relevant}
+        yield futures
+
+
+def _intern(interned: dict, future: FrozenSet[Tuple[str, ...]]) -> FrozenSet[Tuple[str, ...]]:
+    """Return the canonical (shared) instance of a set of k-sequences."""
+    return interned.setdefault(future, future)
+
+
 def get_k_future(m: FSM, k: int, curr_state: str, print_futures=False) -> Set[Tuple[str, ...]]:
     """Return the set of consecutive sequences of k future events or less starting from the given state.
 
@@ -129,33 +369,31 @@ def get_k_future(m: FSM, k: int, curr_state: str, print_futures=False) -> Set[Tu
     """
     assert k > 0
 
-    if k == 1:
-        # base case
-        futures = {tuple({symbol}) for symbol in m.alphabet if (curr_state, symbol) in m.transitions.keys()}
-        if print_futures:
-            print(f'k={k}, curr_state={curr_state}, futures={futures}')
-        return futures
-    else:
-        # recursive case
-        futures = get_k_future(m, k - 1, curr_state)  # futures of exactly k-1 length from the current state
-        for symbol in m.alphabet:
-            if (curr_state, symbol) in m.transitions.keys():
-                next_states = m.transitions[(curr_state, symbol)]
-                for next_state in next_states:
-                    futures |= {tuple({symbol}) + suffix for suffix in get_k_future(m, k - 1, next_state)}
-        if print_futures:
-            print(f'k={k}, curr_state={curr_state}, futures={futures}')
-        return futures
+    if print_futures:
+        for i in range(1, k):
+            print(f'k={i}, curr_state={curr_state}, futures={set(k_futures(m, i, [curr_state])[curr_state])}')
+
+    futures = set(k_futures(m, k, [curr_state])[curr_state])
+    if print_futures:
+        print(f'k={k}, curr_state={curr_state}, futures={futures}')
+    return futures
 
 
-def k_future_mapping(m: FSM, k: int, print_map=False) -> dict:
+def k_future_mapping(m: FSM, k: int, print_map=False, futures=None, counts: dict = None) -> dict:
     """Return the future map for the given FSM and k.
 
     :param m: FSM
     :param k: maximum length of the future sequences
     :param print_map: whether to print the future map (default: False)
+    :param futures: precomputed k-futures of all states (default: None, computed by `k_futures`)
+    :param counts: if given, a dictionary to be filled with the number of traces of each mapping
+                   (future, next future), where the transitions without a count in `m.transition_counts`
+                   count as one trace (as in the PTA generated by `generate_PTA`)
     :return: future map
     """
+    if futures is None:
+        futures = k_futures(m, k)
+
     future_map = dict()
 
     # for each state, we will find the futures and add them to the future map's keys.
@@ -163,53 +401,217 @@ def k_future_mapping(m: FSM, k: int, print_map=False) -> dict:
     for curr_state in m.states:
         next_states = m.next_states(curr_state)
         for next_state in next_states:
-            future_curr = frozenset(get_k_future(m, k, curr_state))
-            future_next = frozenset(get_k_future(m, k, next_state))
-            future_map.setdefault(future_curr, set()).add(future_next)
+            future_map.setdefault(futures[curr_state], set()).add(futures[next_state])
+
+        # the number of traces of each mapping is the total number of traces of its transitions
+        if counts is not None:
+            for symbol, next_states in m.outgoing(curr_state).items():
+                for next_state in next_states:
+                    key = (futures[curr_state], futures[next_state])
+                    counts[key] = counts.get(key, 0) + m.transition_counts.get((curr_state, symbol, next_state), 1)
 
     # print the future map if needed
     if print_map:
-        print('-' * 50)
-        print('Future map:')
-        for future_src in future_map.keys():
-            print(f'{future_src} -> {future_map[future_src]}')
-        print('-' * 50)
+        _print_future_map(future_map)
 
     return future_map
 
 
-def infer_model(future_map: dict, draw_inferred_model=False) -> FSM:
+def _k_windows(m: Union[FSM, CompactAutomaton], k: int) -> Dict[Union[str, int], Dict[Tuple[str, ...], int]]:
+    """Return the k-windows of all states, i.e., the distinct event sequences of length k that start from each state,
+    or shorter ones that end in a state without outgoing transitions (e.g., the special final state),
+    with the number of traces taking each of them in a prefix tree, i.e., the count of the last transition of its path
+    (see `generate_prefix_tree`, where the transitions without a count count as one trace).
+
+    :param m: FSM (or compact automaton, whose states are then given by their ids)
+    :param k: length of the windows
+    :return: dictionary from a state to its k-windows (and their numbers of traces)
+    """
+    if isinstance(m, CompactAutomaton):
+        states = range(len(m.state_names))
+        edges = m.edges
+    else:
+        states = set(m.states) | {state for (state, _) in m.transitions.keys()}
+
+        def edges(state):
+            return [(symbol, next_state, m.transition_counts.get((state, symbol, next_state), 1))
+                    for symbol, next_states in m.outgoing(state).items() for next_state in next_states]
+
+    # the empty window of a state without outgoing transitions has no count of its own
+    windows = {state: {(): None} for state in states}
+    for _ in range(k):
+        next_windows = dict()
+        for state in states:
+            state_edges = edges(state)
+            if not state_edges:
+                next_windows[state] = {(): None}
+                continue
+            state_windows = next_windows[state] = dict()
+            for symbol, next_state, transition_count in state_edges:
+                for window, count in windows[next_state].items():
+                    window = (symbol,) + window
+                    state_windows[window] = state_windows.get(window, 0) + (count or transition_count)
+        windows = next_windows
+    return windows
+
+
+def _window_future(window: Tuple[str, ...], k: int) -> FrozenSet[Tuple[str, ...]]:
+    """Return the k-future of a state in a linear chain, given the window of events that starts from it."""
+    return frozenset(window[:i] for i in range(1, min(k, len(window)) + 1))
+
+
+def _cached_window_future(cache: dict, window: Tuple[str, ...], k: int) -> FrozenSet[Tuple[str, ...]]:
+    """Return the k-future of a window like `_window_future`, using (and filling) the given cache."""
+    window = window[:k]
+    future = cache.get(window)
+    if future is None:
+        future = cache[window] = _window_future(window, k)
+    return future
+
+
+def word_windows(word: Sequence[str], k: int) -> List[Tuple[str, ...]]:
+    """Return the k-windows of the states in the linear chain of a word in the PTA (see `generate_PTA`),
+    from the first state of the chain (after the initial state) to its last state (before the special final state).
+
+    :param word: sequence of symbols
+    :param k: length of the windows
+    :return: list of k-windows
+    """
+    events = tuple(word) + (final_symbol,)
+    return [events[i:i + k] for i in range(len(events))]
+
+
+def window_future_mapping(windows, initial_windows, k: int, counts: dict = None) -> dict:
+    """Return the future map of a PTA with a linear chain of states for each word (see `generate_PTA`),
+    given the (k+1)-windows of its states except the initial state and the (k+1)-windows of the initial state.
+
+    :param windows: (k+1)-windows of the states except the initial state
+    :param initial_windows: (k+1)-windows of the initial state
+    :param k: maximum length of the future sequences
+    :param counts: if given, a dictionary to be filled with the number of traces of each mapping
+                   (future, next future), where the windows must then be dictionaries from each window
+                   to its number of occurrences (i.e., of states in the PTA)
+    :return: future map
+    """
+    future_map = dict()
+
+    # the futures are cached by their first k events, so that equal futures are created (and hashed) only once
+    cache = dict()
+
+    def future(window):
+        return _cached_window_future(cache, window, k)
+
+    # each window determines the future of its state and the future of the next state in the chain
+    for window in windows:
+        if window:
+            future_map.setdefault(future(window), set()).add(future(window[1:]))
+            if counts is not None:
+                key = (future(window), future(window[1:]))
+                counts[key] = counts.get(key, 0) + windows[window]
+
+    # the initial state is shared by all chains, so its future is the union of all of its windows' futures
+    if initial_windows:
+        future_init = frozenset().union(*(future(window) for window in initial_windows))
+        future_map.setdefault(future_init, set()).update(future(window[1:]) for window in initial_windows)
+        if counts is not None:
+            for window in initial_windows:
+                key = (future_init, future(window[1:]))
+                counts[key] = counts.get(key, 0) + initial_windows[window]
+
+    return future_map
+
+
+def prefix_tree_future_mapping(m: Union[FSM, CompactAutomaton], k: int, print_map=False, counts: dict = None) -> dict:
+    """Return the future map for the given prefix tree (see `generate_prefix_tree`) and k.
+    The future map is the same as the one of the PTA generated by `generate_PTA` from the same words,
+    since it is computed from the distinct paths (of length k+1) starting from each state of the prefix tree
+    rather than from the merged futures of the states.
+
+    :param m: prefix tree (or its compact representation, see `generate_prefix_tree`)
+    :param k: maximum length of the future sequences
+    :param print_map: whether to print the future map (default: False)
+    :param counts: if given, a dictionary to be filled with the number of traces of each mapping
+                   (future, next future) (see `k_future_mapping`)
+    :return: future map
+    """
+    windows = _k_windows(m, k + 1)
+    initial_windows = windows.pop(m.initial_state_id if isinstance(m, CompactAutomaton) else m.initial_state)
+    initial_windows = {window: count for window, count in initial_windows.items() if window}  # none without words
+
+    # the same window of several states is taken by all of their traces
+    all_windows = dict()
+    for state_windows in windows.values():
+        for window, count in state_windows.items():
+            if window:
+                all_windows[window] = all_windows.get(window, 0) + count
+    future_map = window_future_mapping(all_windows, initial_windows, k, counts=counts)
+
+    # print the future map if needed
+    if print_map:
+        _print_future_map(future_map)
+
+    return future_map
+
+
+def _print_future_map(future_map: dict):
+    print('-' * 50)
+    print('Future map:')
+    for future_src in future_map.keys():
+        print(f'{future_src} -> {future_map[future_src]}')
+    print('-' * 50)
+
+
+def infer_model(future_map: dict, draw_inferred_model=False, state_futures: dict = None, labels: dict = None,
+                counts: dict = None) -> FSM:
     """Infer a model from the future map.
     It assumes there are special initial and final symbols used in the PTA generation step.
     They are essential to identify the initial and final states from the future map.
 
+    Each distinct set of k-sequences becomes a state named with a compact id (i.e., `f0`, `f1`, ...)
+    in the order of the sorted sets of k-sequences (or of the fingerprints), so that the inferred model
+    does not depend on the order of the future map.
+
     :param future_map: future map
     :param draw_inferred_model: whether to draw the inferred model (default: False)
+    :param state_futures: if given, a dictionary to be filled with the set of k-sequences of each state
+    :param labels: if given, the first symbol of the k-sequences of each future, for the future maps whose futures
+                   are not sets of k-sequences (e.g., fingerprints, see `fingerprint.fingerprint_future_mapping`)
+    :param counts: if given, the number of traces of each mapping (see `k_future_mapping`), recorded in the
+                   `transition_counts` (and the `final_counts`) of the inferred model
     :return: inferred model
     """
     m = FSM()
 
     # each set of k-sequences in the future map (both key and value) is a (merged) state in the inferred model
-    for future_src in future_map.keys():
-        m.states.add(str(future_src))
+    futures = sorted(set(future_map.keys()).union(*future_map.values()), key=_future_order)
+    state_names = {future: f'f{i}' for i, future in enumerate(futures)}
+    m.states = set(state_names.values())
+    if state_futures is not None:
+        state_futures.update((name, future) for future, name in state_names.items())
+
+    for future_src, futures_dst in future_map.items():
+        src = state_names[future_src]
 
         # the first symbol of the k-sequences (of the current state) is the label of the transition
         # note that all the k-sequences in the future map have the same first symbol by design
-        label = tuple(future_src)[0][0]
+        label = labels[future_src] if labels is not None else next(iter(future_src))[0]
         m.alphabet.add(label)
 
         # the set of k-sequences is the initial state if it is the source of the special initial symbol
         if label == initial_symbol:
-            m.initial_state = str(future_src)
+            m.initial_state = src
 
         # process each of the next states' k-sequences in the future map
-        for future_dst in future_map[future_src]:
-            m.states.add(str(future_dst))
-            m.transitions.setdefault((str(future_src), label), set()).add(str(future_dst))
+        for future_dst in futures_dst:
+            dst = state_names[future_dst]
+            count = counts[(future_src, future_dst)] if counts is not None else None
+            m.add_transition(src, label, dst, count=count)
 
             # the set of k-sequences is the final state if it is the target of the special final symbol
             if label == final_symbol:
-                m.final_states.add(str(future_dst))
+                m.final_states.add(dst)
+                if count is not None:
+                    m.final_counts[dst] = m.final_counts.get(dst, 0) + count
 
     # draw the inferred model if needed
     if draw_inferred_model:
@@ -219,45 +621,376 @@ def infer_model(future_map: dict, draw_inferred_model=False) -> FSM:
     return m
 
 
-def ktail(words: List[str], k: int, sep=' ', shorten_state_names=True, print_internals=False) -> FSM:
+def _future_order(future):
+    """Return the sort key of a future, i.e., its sorted k-sequences (or the fingerprint itself)."""
+    return sorted(future) if isinstance(future, frozenset) else future
+
+
+def ktail(words: Iterable[Union[str, Sequence[str]]], k: int, sep=' ', shorten_state_names=True, print_internals=False,
+          prefix_tree=False, engine='pta', minimize=False, metrics: MetricsCallback = None, trace_memory=False,
+          cache=None, weighted=False, compact=False, fingerprint_options: dict = None) -> Union[FSM, CompactAutomaton]:
     """The k-tail algorithm that infers a model from a set of words and a given k.
 
-    :param words: list of words (each word is a whitespace-separated sequence of symbols by default)
+    :param words: list of words (each word is a whitespace-separated sequence of symbols by default),
+                  or any iterable of words or of sequences of symbols (e.g., `trace_reader.read_traces`)
     :param k: the parameter k
     :param sep: separator between symbols in the words (default: whitespace)
     :param shorten_state_names: whether to shorten state names (default: True)
     :param print_internals: whether to print the internal steps (default: False)
+    :param prefix_tree: whether to share the common prefixes of the words in the PTA (default: False)
+    :param engine: how to compute the future map; 'pta' to generate the PTA and compute the futures of its states,
+                   'kgram' to compute them directly from the words (see `kgram_engine`, requires NumPy),
+                   or 'fingerprint' to compute their fingerprints from the words, in bounded memory for large k
+                   (see `fingerprint`, requires NumPy) (default: 'pta');
+                   the models of the 'fingerprint' engine are the same up to the names of their states, which are
+                   numbered in the order of the fingerprints rather than of the futures
+    :param minimize: whether to determinize and minimize the inferred model, which accepts the same words
+                     with fewer states and without nondeterminism (default: False)
+    :param metrics: callback receiving the name and the report (wall time, peak memory and counters) of each step,
+                    e.g., `instrumentation.log_metrics()` (default: None, no measurement)
+    :param trace_memory: whether the reports include the peak memory of each step, traced by `tracemalloc`,
+                         which slows down the steps (and inflates their wall times) several times (default: False)
+    :param cache: path to a cache directory or an `InferenceCache` to reuse the PTA, the future map and the model
+                  inferred before from the same words (default: None, no cache);
+                  the words are then read into a list, and nothing is printed or measured for the cached steps
+    :param weighted: whether to record the number of traces taking each transition (and ending in each final state)
+                     in the `transition_counts` (and `final_counts`) of the inferred model, e.g., to compute
+                     its transition probabilities or the likelihood of traces (see `FiniteStateAutomaton`)
+                     (not supported by the 'fingerprint' engine, and not kept by `minimize`) (default: False)
+    :param compact: whether to generate the PTA (with the 'pta' engine, as a prefix tree) directly in the
+                    memory-efficient representation of `CompactAutomaton`, and return the inferred model in that
+                    representation (default: False)
+    :param fingerprint_options: keyword arguments of `fingerprint.fingerprint_future_mapping` for the 'fingerprint'
+                                engine, i.e., `verify` to check that no two different futures have the same
+                                fingerprint (which would merge their states) and `spill` to keep the windows of the
+                                futures in a file (default: None, i.e., no check and in memory)
     :return: inferred model
     """
+    assert engine in ('pta', 'kgram', 'fingerprint')
+    assert not (weighted and (engine == 'fingerprint' or minimize))
+    assert fingerprint_options is None or engine == 'fingerprint'
+
+    # the keys of the (intermediate) results in the cache, if any
+    keys = dict.fromkeys(('pta', 'mapping', 'model'))
+    if cache is not None:
+        if not isinstance(cache, InferenceCache):
+            cache = InferenceCache(cache)
+        words = list(words)
+        digest = InferenceCache.digest(words, sep)
+        keys['pta'] = InferenceCache.key(ALGORITHM_VERSION, digest, 'pta', prefix_tree, compact)
+        keys['mapping'] = InferenceCache.key(ALGORITHM_VERSION, digest, 'mapping', k, engine, prefix_tree, weighted)
+        keys['model'] = InferenceCache.key(ALGORITHM_VERSION, digest, 'model', k, engine, prefix_tree, minimize,
+                                           shorten_state_names, weighted, compact)
+
+        m_k = cache.get(keys['model'])
+        if m_k is not None:
+            return m_k
+
+    steps = _Steps(metrics, trace_memory=trace_memory, cache=cache, keys=keys)
+    compute_future_map = _future_map_steps(engine, prefix_tree=prefix_tree, compact=compact,
+                                           fingerprint_options=fingerprint_options)
+
+    # Step1 and Step2: Compute the future map (and the counts of its mappings if weighted)
+    counts = dict() if weighted else None
+    future_map, labels, counts = steps.cached('mapping', lambda: (
+        *compute_future_map(words, k, sep, steps, counts=counts, print_internals=print_internals), counts))
+
+    # Step3: Infer the model from the future map
+    m_k = steps.run('inference', lambda: infer_model(future_map, labels=labels, counts=counts))
+
+    # (optional) minimize the inferred model if needed
+    if minimize:
+        m_k = steps.run('minimization', lambda: minimize_dfa(m_k))
 
+    # (optional) shorten the state names if needed
+    if shorten_state_names:
+        m_k = steps.run('renaming', lambda: rename_states(m_k, print_renaming=print_internals))
+
+    # (optional) convert the model to its compact representation if needed
+    if compact:
+        m_k = steps.run('compaction', lambda: CompactAutomaton.from_fsm(m_k))
+
+    if cache is not None:
+        cache.put(keys['model'], m_k)
+    return m_k
+
+
+def _future_map_steps(engine: str, prefix_tree=False, compact=False, fingerprint_options: dict = None) \
+        -> Callable[..., Tuple[dict, Optional[dict]]]:
+    """Return the function computing the future map from the words (Step1 and Step2) for the options of `ktail`."""
+    if engine == 'fingerprint':
+        return partial(_fingerprint_future_map, **(fingerprint_options or dict()))
+    if engine == 'kgram':
+        return _kgram_future_map
+    if compact:
+        return _compact_prefix_tree_future_map
+    if prefix_tree:
+        return _prefix_tree_future_map
+    return _pta_future_map
+
+
+class _Steps:
+    """The measurement (see `instrumentation.measure_stage`) and the caching (see `cache.InferenceCache`)
+    of the steps of a run of `ktail`."""
+
+    def __init__(self, metrics: MetricsCallback = None, trace_memory=False, cache: InferenceCache = None,
+                 keys: Dict[str, str] = None):
+        self.metrics = metrics
+        self.trace_memory = trace_memory
+        self.cache = cache
+        self.keys = keys
+
+    def run(self, name: str, compute: Callable[[], Any], counters: Callable[[Any], dict] = fsm_counters):
+        """Run a step, measured and reported with the counters of its result if there is a metrics callback."""
+        if self.metrics is None:
+            return compute()
+        with measure_stage(self.metrics, name, trace_memory=self.trace_memory) as stage_counters:
+            result = compute()
+            stage_counters.update(counters(result))
+        return result
+
+    def cached(self, name: str, compute: Callable[[], Any]):
+        """Return the result of a step from the cache if possible, and compute and cache it otherwise."""
+        if self.cache is None:
+            return compute()
+        result = self.cache.get(self.keys[name])
+        if result is None:
+            result = compute()
+            self.cache.put(self.keys[name], result)
+        return result
+
+
+def _fingerprint_future_map(words, k: int, sep, steps: _Steps, counts: dict = None, print_internals=False,
+                            **fingerprint_options) -> Tuple[dict, dict]:
+    """Compute the future map of fingerprints from the words directly, without the PTA (see `fingerprint`),
+    and return it with the labels of the fingerprints (where the mappings are not counted)."""
+    from fingerprint import fingerprint_future_mapping
+
+    def compute():
+        with fingerprint_future_mapping(words, k, sep=sep, **fingerprint_options) as fingerprints:
+            return fingerprints.future_map, fingerprints.labels
+
+    def counters(result):
+        future_map, _ = result
+        return {'distinct_futures': len(set(future_map.keys()).union(*future_map.values())),
+                'mappings': sum(len(futures_dst) for futures_dst in future_map.values())}
+
+    future_map, labels = steps.run('mapping', compute, counters)
+    if print_internals:
+        _print_future_map(future_map)
+    return future_map, labels
+
+
+def _kgram_future_map(words, k: int, sep, steps: _Steps, counts: dict = None, print_internals=False) \
+        -> Tuple[dict, None]:
+    """Compute the future map from the words directly, without the PTA (see `kgram_engine`)."""
+    from kgram_engine import kgram_future_mapping
+
+    future_map = steps.run('mapping', lambda: kgram_future_mapping(words, k, sep=sep, counts=counts),
+                           future_map_counters)
+    if print_internals:
+        _print_future_map(future_map)
+    return future_map, None
+
+
+def _prefix_tree_future_map(words, k: int, sep, steps: _Steps, counts: dict = None, print_internals=False,
+                            compact=False) -> Tuple[dict, None]:
+    """Generate the PTA as a prefix tree (see `generate_prefix_tree`) and compute its future map."""
+    # Step1: Generate a PTA (prefix tree) from the given set of words
+    def generate():
+        return generate_prefix_tree(words, sep=sep, draw_PTA=print_internals, compact=compact)
+
+    m = steps.run('pta', lambda: steps.cached('pta', generate))
+
+    # Step2: Compute the future map from the PTA
+    future_map = steps.run('mapping', lambda: prefix_tree_future_mapping(m, k, print_map=print_internals, counts=counts),
+                           future_map_counters)
+    return future_map, None
+
+
+def _compact_prefix_tree_future_map(words, k: int, sep, steps: _Steps, counts: dict = None, print_internals=False) \
+        -> Tuple[dict, None]:
+    """Generate the PTA as a compact prefix tree (see `generate_prefix_tree`) and compute its future map."""
+    return _prefix_tree_future_map(words, k, sep, steps, counts=counts, print_internals=print_internals, compact=True)
+
+
+def _pta_future_map(words, k: int, sep, steps: _Steps, counts: dict = None, print_internals=False) -> Tuple[dict, None]:
+    """Generate the PTA (see `generate_PTA`), compute the futures of its states and its future map."""
     # Step1: Generate a PTA from the given set of words
-    m = generate_PTA(words, sep=sep, draw_PTA=print_internals)
+    m = steps.run('pta', lambda: steps.cached('pta', lambda: generate_PTA(words, sep=sep, draw_PTA=print_internals)))
 
     # (optional) print the future k-sequences for each state and the k-equivalent classes
+    futures = steps.run('futures', lambda: k_futures(m, k), future_counters)
     if print_internals:
-        print('Future k-sequences:')
-        for state in natsorted(m.states):
-            print(f'future_{k}({state}) = {get_k_future(m, k, state)}')
-        print('-' * 50)
-
-        equivalent_classes = dict()
-        for state in m.states:
-            equivalent_classes.setdefault(frozenset(get_k_future(m, k, state)), set()).add(state)
-        print('Equivalent classes:')
-        for k_seq, states in equivalent_classes.items():
-            print(f'{k_seq} -> {natsorted(states)}')
+        _print_futures(m, k, futures)
 
     # Step2: Compute the future map from the PTA
-    future_map = k_future_mapping(m, k, print_map=print_internals)
+    future_map = steps.run('mapping', lambda: k_future_mapping(m, k, print_map=print_internals, futures=futures,
+                                                               counts=counts),
+                           future_map_counters)
+    return future_map, None
+
+
+def _print_futures(m: FSM, k: int, futures: Dict[str, FrozenSet[Tuple[str, ...]]]):
+    print('Future k-sequences:')
+    for state in natsorted(m.states):
+        print(f'future_{k}({state}) = {set(futures[state])}')
+    print('-' * 50)
+
+    equivalent_classes = dict()
+    for state in m.states:
+        equivalent_classes.setdefault(futures[state], set()).add(state)
+    print('Equivalent classes:')
+    for k_seq, states in equivalent_classes.items():
+        print(f'{k_seq} -> {natsorted(states)}')
+
+
+def ktail_sweep(words: Iterable[Union[str, Sequence[str]]], ks: Iterable[int], sep=' ', shorten_state_names=True) \
+        -> Dict[int, Tuple[FSM, dict]]:
+    """The k-tail algorithm for several values of k, sharing the PTA and the computation of the futures.
+    The PTA is generated once, and the futures are computed once up to the largest k,
+    since the j-futures of all states are computed on the way to the k-futures (see `k_future_levels`).
+
+    :param words: list of words (or any iterable of words or of sequences of symbols)
+    :param ks: values of the parameter k
+    :param sep: separator between symbols in the words (default: whitespace)
+    :param shorten_state_names: whether to shorten state names (default: True)
+    :return: dictionary from each k to the inferred model and its statistics (number of states and transitions,
+             and the time in seconds spent for the k, excluding the PTA generation)
+    """
+    ks = set(ks)
+    assert ks and min(ks) > 0
 
-    # Step3: Infer the model from the future map
-    m_k = infer_model(future_map)
+    # Step1: Generate a PTA from the given set of words (once for all k)
+    m = generate_PTA(words, sep=sep)
 
-    # (optional) shorten the state names if needed
-    if shorten_state_names:
-        m_k = rename_states(m_k)
+    results = dict()
+    start = time.perf_counter()
+    for k, futures in enumerate(k_future_levels(m, max(ks)), start=1):
+        if k not in ks:
+            continue
 
-    return m_k
+        # Step2 and Step3: Compute the future map and infer the model, reusing the futures of level k
+        future_map = k_future_mapping(m, k, futures=futures)
+        m_k = infer_model(future_map)
+        if shorten_state_names:
+            m_k = rename_states(m_k)
+
+        end = time.perf_counter()
+        results[k] = (m_k, {'states': len(m_k.states),
+                            'transitions': sum(len(next_states) for next_states in m_k.transitions.values()),
+                            'time': end - start})
+        start = end
+
+    return results
+
+
+class IncrementalKTail:
+    """The k-tail algorithm that keeps its intermediate results so that new words can be added to an inferred model.
+
+    The words are stored in a prefix tree (see `generate_prefix_tree`), together with the (k+1)-windows of its states
+    and the future map (see `prefix_tree_future_mapping`). When new words are added, only the windows of the states
+    whose k-neighbourhood has changed (i.e., the states up to k transitions before a new transition) are recomputed.
+    The future map and the model are always the same as the ones of `ktail` for all the words added so far.
+    """
+
+    def __init__(self, k: int, sep=' ', shorten_state_names=True):
+        """
+        :param k: the parameter k
+        :param sep: separator between symbols in the words (default: whitespace)
+        :param shorten_state_names: whether to shorten state names of the model (default: True)
+        """
+        assert k > 0
+        self.k = k
+        self.sep = sep
+        self.shorten_state_names = shorten_state_names
+
+        self.pta = _new_prefix_tree()
+        self._parents = dict()  # state -> parent state in the prefix tree
+        self._depths = {self.pta.initial_state: 0}  # state -> depth in the prefix tree
+        self._windows = dict()  # state -> (k+1)-windows of the state
+        self._future_cache = dict()  # window -> future
+
+        # the future map is kept without the entry of the initial state, which changes with (almost) every new word
+        self._future_map = dict()
+        self._future_init = frozenset()
+        self._futures_after_init = set()
+
+        self._model = None
+
+    def add_traces(self, words: Iterable[Union[str, Sequence[str]]]):
+        """Add new words and update the future map.
+
+        :param words: iterable of words or of sequences of symbols
+        """
+        # Step1: add the words to the prefix tree, collecting the states with new outgoing transitions
+        changed_states = set()
+        for word in words:
+            changed_states.update(self._add_word(word))
+
+        # Step2: find the states whose (k+1)-windows may have changed (i.e., within k transitions before the changes)
+        affected_states = set()
+        for state in changed_states:
+            affected_states.update(self._ancestors(state, self.k + 1))
+
+        # Step3: recompute the windows of the affected states bottom-up and update the future map with the new windows
+        for state in sorted(affected_states, key=self._depths.get, reverse=True):
+            self._update_windows(state)
+
+        if affected_states:
+            self._model = None
+
+    def _add_word(self, word: Union[str, Sequence[str]]) -> List[str]:
+        """Add a word to the prefix tree and return the states with new outgoing transitions."""
+        changed_states = []
+        for state, _, next_state in _add_to_prefix_tree(self.pta, word, sep=self.sep):
+            changed_states.append(state)
+            if next_state not in self.pta.final_states:
+                self._parents[next_state] = state
+                self._depths[next_state] = self._depths[state] + 1
+        return changed_states
+
+    def _ancestors(self, state: str, n: int) -> List[str]:
+        """Return a state and its ancestors in the prefix tree, up to `n` states."""
+        ancestors = []
+        while state is not None and len(ancestors) < n:
+            ancestors.append(state)
+            state = self._parents.get(state)
+        return ancestors
+
+    def _update_windows(self, state: str):
+        """Recompute the windows of a state from the ones of its children, and add the new windows to the future map."""
+        windows = {(symbol,) + window[:self.k] for symbol, next_states in self.pta.outgoing(state).items()
+                   for next_state in next_states for window in self._windows.get(next_state, {()})}
+        new_windows = windows - self._windows.get(state, set())
+        self._windows[state] = windows
+
+        if state == self.pta.initial_state:
+            self._future_init = self._future_init.union(*(self._future(window) for window in new_windows))
+            self._futures_after_init.update(self._future(window[1:]) for window in new_windows)
+        else:
+            for window in new_windows:
+                self._future_map.setdefault(self._future(window), set()).add(self._future(window[1:]))
+
+    def _future(self, window):
+        return _cached_window_future(self._future_cache, window, self.k)
+
+    @property
+    def future_map(self) -> dict:
+        """The future map of all the words added so far (a copy, which can be modified)."""
+        future_map = {future: set(futures_dst) for future, futures_dst in self._future_map.items()}
+        if self._futures_after_init:
+            future_map[self._future_init] = self._future_map.get(self._future_init, set()) | self._futures_after_init
+        return future_map
+
+    @property
+    def model(self) -> FSM:
+        """The model inferred from all the words added so far."""
+        if self._model is None:
+            self._model = infer_model(self.future_map)
+            if self.shorten_state_names:
+                self._model = rename_states(self._model)
+        return self._model
 
 
 if __name__ == '__main__':
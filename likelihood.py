@@ -0,0 +1,83 @@
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from dfa import shared_prefix_paths
+
+
+def _state_weights(m) -> Dict[str, int]:
+    """Return the total weight of each state, i.e., the number of traces leaving it or ending in it."""
+    weights = dict()
+    for (state, symbol), next_states in m.transitions.items():
+        for next_state in next_states:
+            weights[state] = weights.get(state, 0) + m.transition_counts.get((state, symbol, next_state), 1)
+    for state in m.final_states:
+        weights[state] = weights.get(state, 0) + m.final_counts.get(state, 1)
+    return weights
+
+
+def transition_probabilities(m) -> Dict[Tuple[str, str, str], float]:
+    """Return the probability of each transition (see `FiniteStateAutomaton.transition_probabilities`)."""
+    weights = _state_weights(m)
+    return {(state, symbol, next_state): m.transition_counts.get((state, symbol, next_state), 1) / weights[state]
+            for (state, symbol), next_states in m.transitions.items() for next_state in next_states}
+
+
+def log_likelihood_batch(m, words: Iterable[Union[str, Sequence[str]]], sep=' ') -> List[float]:
+    """Return the log-likelihood of each of the given words (see `FiniteStateAutomaton.log_likelihood_batch`).
+
+    The likelihood of a word is the total probability of its paths (i.e., the forward algorithm), computed with
+    a vector of the probabilities of all states and, for each symbol, the arrays of the sources, targets and
+    probabilities of its transitions. The probabilities are normalized after each symbol (and their sum is
+    accumulated in log scale), so that long words do not underflow.
+    """
+    traces = [tuple(word.split(sep) if isinstance(word, str) else word) for word in words]
+    weights = _state_weights(m)
+
+    states = set(m.states) | {m.initial_state} | set(weights)
+    states.update(*m.transitions.values())
+    state_ids = {state: i for i, state in enumerate(states)}
+    n = len(state_ids)
+
+    # symbol -> (source state ids, target state ids, probabilities) of its transitions
+    edges = dict()
+    for (state, symbol, next_state), probability in transition_probabilities(m).items():
+        sources, targets, probabilities = edges.setdefault(symbol, ([], [], []))
+        sources.append(state_ids[state])
+        targets.append(state_ids[next_state])
+        probabilities.append(probability)
+    edges = {symbol: (np.array(sources, dtype=np.intp), np.array(targets, dtype=np.intp), np.array(probabilities))
+             for symbol, (sources, targets, probabilities) in edges.items()}
+
+    # the probability of stopping in each state
+    end = np.zeros(n)
+    for state in m.final_states:
+        end[state_ids[state]] = m.final_counts.get(state, 1) / weights[state]
+
+    def step(forward: Tuple[Optional[np.ndarray], float], symbol) -> Tuple[Optional[np.ndarray], float]:
+        probabilities, log_likelihood = forward
+        transitions = edges.get(symbol)
+        if transitions is None:
+            return None, -math.inf
+        sources, targets, q = transitions
+        next_probabilities = np.bincount(targets, weights=probabilities[sources] * q, minlength=n)
+        total = next_probabilities.sum()
+        if total <= 0:
+            return None, -math.inf
+        return next_probabilities / total, log_likelihood + math.log(total)
+
+    log_likelihoods = [-math.inf] * len(traces)
+
+    # path[i] is the (normalized) probabilities of the states and the log-likelihood of the first i symbols
+    initial = np.zeros(n)
+    initial[state_ids[m.initial_state]] = 1.0
+    for index, path in shared_prefix_paths(traces, (initial, 0.0), step, stop=lambda forward: forward[0] is None):
+        # the word ends in a final state with the probability of stopping there
+        probabilities, log_likelihood = path[-1]
+        if probabilities is not None:
+            probability_end = float(probabilities @ end)
+            if probability_end > 0:
+                log_likelihoods[index] = log_likelihood + math.log(probability_end)
+
+    return log_likelihoods
@@ -0,0 +1,163 @@
+import time
+from collections import OrderedDict
+from typing import AsyncIterable, Callable, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+from dfa import LazyDFA
+from ktail import final_symbol, initial_symbol
+
+
+class Deviation(NamedTuple):
+    """A deviation of a session from the model."""
+    session_id: Hashable
+    position: int  # position of the event in the session (from 0 for its first event)
+    event: Optional[str]  # the unexpected event, or None if the session ended in a non-accepting state
+
+
+class ConformanceMonitor:
+    """An online monitor checking that the sessions of a live event stream conform to a model.
+
+    Each session is tracked by the state of the lazily determinized model (see `dfa.LazyDFA`) reached by its events
+    so far, so that each event is checked by a single lookup in the (cached) transition table of the DFA.
+    A deviation is reported (once per session) as soon as an event is not allowed by the model,
+    or when a session ends in a state that is not accepting.
+    """
+
+    def __init__(self, m, on_deviation: Callable[[Deviation], None] = None, idle_timeout: float = None,
+                 on_evict: Callable[[Hashable], None] = None, start_symbol: Optional[str] = initial_symbol,
+                 end_symbol: Optional[str] = final_symbol, clock: Callable[[], float] = time.monotonic):
+        """
+        :param m: FSM (e.g., inferred by `ktail.ktail`)
+        :param on_deviation: callback receiving each deviation when it is found (default: None)
+        :param idle_timeout: time (of the clock) after which a session without events is evicted
+                             (default: None, no eviction)
+        :param on_evict: callback receiving the id of each evicted session (default: None)
+        :param start_symbol: symbol read at the start of each session (default: '$', None for no symbol)
+        :param end_symbol: symbol read at the end of each session, where this event ends the session
+                           (default: '#', None for no symbol)
+        :param clock: function returning the current time (default: `time.monotonic`)
+        """
+        self.dfa = LazyDFA(m)
+        self.on_deviation = on_deviation
+        self.idle_timeout = idle_timeout
+        self.on_evict = on_evict
+        self.end_symbol = end_symbol
+        self.clock = clock
+
+        # session id -> [DFA state id, number of events, time of the last event], ordered by the time of the last event
+        self._sessions = OrderedDict()
+        self._start = self.dfa.initial if start_symbol is None else self.dfa.step(self.dfa.initial, start_symbol)
+
+    @property
+    def sessions(self) -> int:
+        """The number of sessions being monitored."""
+        return len(self._sessions)
+
+    def _report(self, session_id, position, event) -> Deviation:
+        deviation = Deviation(session_id, position, event)
+        if self.on_deviation is not None:
+            self.on_deviation(deviation)
+        return deviation
+
+    def feed(self, session_id: Hashable, event: str) -> Optional[Deviation]:
+        """Check the next event of a session (which starts with its first event).
+
+        :param session_id: id of the session
+        :param event: event
+        :return: the deviation if the event deviates from the model (for the first time in the session), else None
+        """
+        if event == self.end_symbol:
+            return self.end(session_id)
+
+        sessions = self._sessions
+        session = sessions.get(session_id)
+        new_session = session is None
+        if new_session:
+            session = sessions[session_id] = [self._start, 0, None]
+        if self.idle_timeout is not None:
+            now = session[2] = self.clock()
+            sessions.move_to_end(session_id)
+            # only the least recently active session needs to be checked to know if any session is idle
+            if next(iter(sessions.values()))[2] < now - self.idle_timeout:
+                self.evict_idle(now)
+        if new_session and self._start == LazyDFA.DEAD:
+            # the model cannot even start a session
+            session[1] = 1
+            return self._report(session_id, 0, event)
+
+        state_id = session[0]
+        position = session[1]
+        session[1] = position + 1
+        if state_id == LazyDFA.DEAD:
+            return None  # the deviation of the session is already reported
+
+        next_id = self.dfa.step(state_id, event)
+        session[0] = next_id
+        if next_id == LazyDFA.DEAD:
+            return self._report(session_id, position, event)
+        return None
+
+    def feed_batch(self, events: Iterable[Tuple[Hashable, str]]) -> List[Deviation]:
+        """Check a batch of events, each given with the id of its session (see `feed`).
+
+        :param events: iterable of (session id, event) pairs
+        :return: the deviations found in the batch
+        """
+        deviations = []
+        feed = self.feed
+        for session_id, event in events:
+            deviation = feed(session_id, event)
+            if deviation is not None:
+                deviations.append(deviation)
+        return deviations
+
+    async def consume(self, stream: AsyncIterable[Tuple[Hashable, str]]) -> int:
+        """Check the events of an asynchronous stream of (session id, event) pairs until the stream ends
+        (see `feed`), where the deviations are reported to the callback.
+
+        :param stream: asynchronous iterable of (session id, event) pairs
+        :return: the number of events
+        """
+        count = 0
+        feed = self.feed
+        async for session_id, event in stream:
+            feed(session_id, event)
+            count += 1
+        return count
+
+    def end(self, session_id: Hashable) -> Optional[Deviation]:
+        """End a session, and stop monitoring it.
+
+        :param session_id: id of the session
+        :return: the deviation if the session ends in a non-accepting state (and deviated nowhere before), else None
+        """
+        state_id, position, _ = self._sessions.pop(session_id, None) or (self._start, 0, None)
+        if state_id == LazyDFA.DEAD:
+            return None
+        if self.end_symbol is not None:
+            state_id = self.dfa.step(state_id, self.end_symbol)
+        if not self.dfa.accepting[state_id]:
+            return self._report(session_id, position, None)
+        return None
+
+    def evict_idle(self, now: float = None) -> List[Hashable]:
+        """Stop monitoring the sessions without events for longer than the idle timeout.
+
+        :param now: current time (default: None, the time of the clock)
+        :return: the ids of the evicted sessions
+        """
+        if self.idle_timeout is None:
+            return []
+        deadline = (self.clock() if now is None else now) - self.idle_timeout
+
+        # the sessions are ordered by the time of their last events, so that the idle ones are the first ones
+        evicted = []
+        sessions = self._sessions
+        while sessions:
+            session_id, session = next(iter(sessions.items()))
+            if session[2] >= deadline:
+                break
+            del sessions[session_id]
+            evicted.append(session_id)
+            if self.on_evict is not None:
+                self.on_evict(session_id)
+        return evicted
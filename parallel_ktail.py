@@ -0,0 +1,126 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from typing import Iterable, List, Sequence, Tuple, Union
+
+from finite_state_automaton import FiniteStateAutomaton as FSM
+from ktail import initial_symbol, infer_model, rename_states, window_future_mapping, word_windows
+
+PADDING = -1  # symbol id filling up the windows shorter than k+1 in the packed arrays
+
+
+def _pack(windows, symbol_ids: dict, width: int) -> bytes:
+    """Pack a set of windows into the bytes of a fixed-width array of symbol ids."""
+    packed = array('i')
+    for window in windows:
+        packed.extend(symbol_ids.setdefault(symbol, len(symbol_ids)) for symbol in window)
+        packed.extend([PADDING] * (width - len(window)))
+    return packed.tobytes()
+
+
+def _unpack(data: bytes, symbols: List[str], width: int) -> List[Tuple[str, ...]]:
+    """Unpack the windows packed by `_pack`."""
+    packed = array('i')
+    packed.frombytes(data)
+    return [tuple(symbols[symbol_id] for symbol_id in packed[i:i + width] if symbol_id != PADDING)
+            for i in range(0, len(packed), width)]
+
+
+def _shard_windows(args) -> Tuple[List[str], bytes, bytes]:
+    """Compute the distinct (k+1)-windows of the words in a shard (executed by a worker process).
+
+    :param args: tuple of the shard (list of words or of sequences of symbols), k and the separator
+    :return: tuple of the symbol table, the packed windows and the packed windows of the first states of the chains
+    """
+    shard, k, sep = args
+
+    windows = set()
+    first_windows = set()
+    for word in shard:
+        if isinstance(word, str):
+            word = word.split(sep=sep)
+        assert len(word) > 0
+        chain_windows = word_windows(word, k + 1)
+        windows.update(chain_windows)
+        first_windows.add(chain_windows[0])
+
+    # the symbols are interned locally, so that only the integer ids of the windows are sent back
+    symbol_ids = dict()
+    packed_windows = _pack(windows, symbol_ids, k + 1)
+    packed_first_windows = _pack(first_windows, symbol_ids, k + 1)
+    return list(symbol_ids.keys()), packed_windows, packed_first_windows
+
+
+def _shards(words: Iterable, shard_size: int) -> Iterable[list]:
+    words = iter(words)
+    while True:
+        shard = list(islice(words, shard_size))
+        if not shard:
+            return
+        yield shard
+
+
+def parallel_future_mapping(words: Iterable[Union[str, Sequence[str]]], k: int, sep=' ', workers=None,
+                            shard_size=10000) -> dict:
+    """Return the future map of the PTA of the given words (see `k_future_mapping`), computed in parallel.
+    The words are split into shards, and a pool of worker processes computes the distinct (k+1)-windows of each shard,
+    from which the future map is computed after merging (i.e., taking the union of) the windows of all shards.
+
+    :param words: iterable of words or of sequences of symbols
+    :param k: maximum length of the future sequences
+    :param sep: separator between symbols in the words (default: whitespace)
+    :param workers: number of worker processes (default: None, the number of processors)
+    :param shard_size: number of words in a shard (default: 10000)
+    :return: future map
+    """
+    assert k > 0
+    assert shard_size > 0
+
+    windows = set()
+    first_windows = set()
+
+    def merge(result):
+        symbols, packed_windows, packed_first_windows = result
+        windows.update(_unpack(packed_windows, symbols, k + 1))
+        first_windows.update(_unpack(packed_first_windows, symbols, k + 1))
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # keep a bounded number of shards in flight, so that the words are not all loaded at once
+        max_pending = 2 * workers
+        pending = set()
+        for shard in _shards(words, shard_size):
+            pending.add(executor.submit(_shard_windows, (shard, k, sep)))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge(future.result())
+        for future in pending:
+            merge(future.result())
+
+    # the initial state goes to the first state of every chain
+    initial_windows = {(initial_symbol,) + window[:k] for window in first_windows}
+    return window_future_mapping(windows, initial_windows, k)
+
+
+def parallel_ktail(words: Iterable[Union[str, Sequence[str]]], k: int, sep=' ', shorten_state_names=True,
+                   workers=None, shard_size=10000) -> FSM:
+    """The k-tail algorithm (see `ktail`) where the future map is computed in parallel across shards of the words.
+
+    :param words: iterable of words or of sequences of symbols
+    :param k: the parameter k
+    :param sep: separator between symbols in the words (default: whitespace)
+    :param shorten_state_names: whether to shorten state names (default: True)
+    :param workers: number of worker processes (default: None, the number of processors)
+    :param shard_size: number of words in a shard (default: 10000)
+    :return: inferred model
+    """
+    future_map = parallel_future_mapping(words, k, sep=sep, workers=workers, shard_size=shard_size)
+    m_k = infer_model(future_map)
+
+    # (optional) shorten the state names if needed
+    if shorten_state_names:
+        m_k = rename_states(m_k)
+
+    return m_k
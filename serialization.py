@@ -0,0 +1,190 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Sequence, Union
+
+from compact_automaton import CompactAutomaton
+from finite_state_automaton import FiniteStateAutomaton as FSM
+
+MAGIC = b'KTAILFSM'
+VERSION = 2
+JSON_FORMAT = 'ktail-fsm'
+
+# header: magic, version, number of symbols, number of states, number of edges, number of edge counts (0 or the number
+# of edges), number of final counts, initial state id
+HEADER = struct.Struct('<8sIQQQQQQ')
+ALIGNMENT = 8
+
+
+def save(m: Union[FSM, CompactAutomaton], path, fmt=None):
+    """Save an FSM to a file, in a compact binary format or in JSON.
+
+    The binary format (little-endian) consists of a header, the symbol and state tables (each as the offsets of the
+    strings followed by their UTF-8 encodings), the final state flags, the transition arrays of `CompactAutomaton`
+    and the counts of a weighted model (the edge counts, and the ids and counts of the final states), where each
+    section starts at a multiple of 8 bytes so that it can be used in place when memory-mapped.
+
+    :param m: FSM (or compact automaton)
+    :param path: path to the file
+    :param fmt: 'binary' or 'json' (default: None, 'json' if the path ends with '.json', 'binary' otherwise)
+    """
+    if fmt is None:
+        fmt = 'json' if str(path).endswith('.json') else 'binary'
+    assert fmt in ('binary', 'json')
+
+    if fmt == 'json':
+        _save_json(m, path)
+    else:
+        _save_binary(m if isinstance(m, CompactAutomaton) else CompactAutomaton.from_fsm(m), path)
+
+
+def load(path, use_mmap=True) -> Union[FSM, CompactAutomaton]:
+    """Load an FSM saved by `save`.
+    A binary file is loaded as a `CompactAutomaton`, whose arrays are memory-mapped (unless `use_mmap` is False),
+    so that it can answer `is_accepted` queries without reading the whole file or creating Python objects
+    for all of its states and transitions. A JSON file is loaded as a `FiniteStateAutomaton`.
+
+    :param path: path to the file
+    :param use_mmap: whether to memory-map a binary file (default: True)
+    :return: FSM (or compact automaton)
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            f.seek(0)
+            return _load_json(json.load(f))
+        f.seek(0)
+        if use_mmap:
+            data = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            data = memoryview(f.read())
+    return _load_binary(data)
+
+
+def _save_json(m: Union[FSM, CompactAutomaton], path):
+    content = {
+        'format': JSON_FORMAT,
+        'version': VERSION,
+        'alphabet': sorted(m.alphabet),
+        'states': sorted(m.states),
+        'initial_state': m.initial_state,
+        'final_states': sorted(m.final_states),
+        'transitions': [[state, symbol, sorted(next_states)]
+                        for (state, symbol), next_states in sorted(m.transitions.items())],
+        'transition_counts': [[state, symbol, next_state, count]
+                              for (state, symbol, next_state), count in sorted(m.transition_counts.items())],
+        'final_counts': [[state, count] for state, count in sorted(m.final_counts.items())],
+    }
+    with open(path, 'w') as f:
+        json.dump(content, f, indent=1)
+
+
+def _load_json(content: dict) -> FSM:
+    if content.get('format') != JSON_FORMAT or content.get('version') != VERSION:
+        raise ValueError(f"unsupported FSM file (format: {content.get('format')}, version: {content.get('version')})")
+
+    m = FSM()
+    m.alphabet = set(content['alphabet'])
+    m.states = set(content['states'])
+    m.initial_state = content['initial_state']
+    m.final_states = set(content['final_states'])
+    for state, symbol, next_states in content['transitions']:
+        for next_state in next_states:
+            m.add_transition(state, symbol, next_state)
+    for state, symbol, next_state, count in content['transition_counts']:
+        m.transition_counts[(state, symbol, next_state)] = count
+    m.final_counts = {state: count for state, count in content['final_counts']}
+    return m
+
+
+def _little_endian(a: array) -> bytes:
+    if sys.byteorder != 'little':
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def _padding(size: int) -> bytes:
+    return b'\0' * (-size % ALIGNMENT)
+
+
+def _string_table(strings: Sequence[str]) -> bytes:
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = array('Q', [0])
+    for s in encoded:
+        offsets.append(offsets[-1] + len(s))
+    blob = b''.join(encoded)
+    return _little_endian(offsets) + blob + _padding(len(blob))
+
+
+def _save_binary(c: CompactAutomaton, path):
+    edge_counts = c.edge_counts if c.edge_counts is not None else array('Q')
+    final_counts = sorted((c.state_id(state), count) for state, count in c.final_counts.items())
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(c.symbols), len(c.state_names), len(c.edge_targets), len(edge_counts),
+                            len(final_counts), c.initial_state_id))
+        f.write(_padding(HEADER.size))
+        f.write(_string_table(c.symbols))
+        f.write(_string_table(c.state_names))
+        f.write(bytes(c.final_flags) + _padding(len(c.final_flags)))
+        f.write(_little_endian(array('Q', c.offsets)))
+        f.write(_little_endian(array('I', c.edge_symbols)) + _padding(4 * len(c.edge_symbols)))
+        f.write(_little_endian(array('I', c.edge_targets)) + _padding(4 * len(c.edge_targets)))
+        f.write(_little_endian(array('Q', edge_counts)))
+        f.write(_little_endian(array('I', [state_id for state_id, _ in final_counts])) + _padding(4 * len(final_counts)))
+        f.write(_little_endian(array('Q', [count for _, count in final_counts])))
+
+
+class _StringTable(Sequence[str]):
+    """A read-only sequence of strings decoded lazily from a (memory-mapped) string table of the binary format."""
+
+    def __init__(self, offsets, blob: memoryview):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+
+def _load_binary(data: memoryview) -> CompactAutomaton:
+    magic, version, n_symbols, n_states, n_edges, n_edge_counts, n_final_counts, initial_state_id = \
+        HEADER.unpack_from(data)
+    if version != VERSION:
+        raise ValueError(f'unsupported FSM file (version: {version})')
+
+    position = HEADER.size + len(_padding(HEADER.size))
+
+    def take(typecode, n):
+        nonlocal position
+        size = n * array(typecode).itemsize
+        section = data[position:position + size]
+        position += size + len(_padding(size))
+        if typecode == 'B':
+            return section
+        if sys.byteorder != 'little':
+            section = array(typecode, section.tobytes())
+            section.byteswap()
+            return section
+        return section.cast(typecode)
+
+    def take_strings(n):
+        offsets = take('Q', n + 1)
+        return _StringTable(offsets, take('B', offsets[-1]))
+
+    symbols = list(take_strings(n_symbols))
+    state_names = take_strings(n_states)
+    final_flags = take('B', n_states)
+    offsets = take('Q', n_states + 1)
+    edge_symbols = take('I', n_edges)
+    edge_targets = take('I', n_edges)
+    edge_counts = take('Q', n_edge_counts) if n_edge_counts else None
+    final_count_states = take('I', n_final_counts)
+    final_counts = {state_names[state_id]: count for state_id, count in zip(final_count_states, take('Q', n_final_counts))}
+    return CompactAutomaton(symbols, state_names, initial_state_id, final_flags, offsets, edge_symbols, edge_targets,
+                            edge_counts=edge_counts, final_counts=final_counts)
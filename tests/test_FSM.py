@@ -1,3 +1,4 @@
+import pickle
 import unittest
 from finite_state_automaton import FiniteStateAutomaton as FSM
 
@@ -52,3 +53,65 @@ class FSMTestCase(unittest.TestCase):
         self.assertEqual(m.next_states('A'), {'A', 'B'})
         self.assertEqual(m.next_states('B'), {'A', 'B', 'C'})
         self.assertEqual(m.next_states('C'), set())
+
+    def test_add_remove_transition(self):
+        m = FSM()
+        m.alphabet = {'0', '1'}
+        m.states = {'A', 'B', 'C'}
+        m.initial_state = 'A'
+        m.final_states = {'C'}
+        m.add_transition('A', '0', 'A')
+        m.add_transition('A', '0', 'B')
+        m.add_transition('A', '1', 'C')
+        self.assertEqual(m.transitions, {('A', '0'): {'A', 'B'}, ('A', '1'): {'C'}})
+        self.assertEqual(m.outgoing('A'), {'0': {'A', 'B'}, '1': {'C'}})
+        self.assertEqual(m.enabled_symbols('A'), {'0', '1'})
+        self.assertEqual(m.next_states('A'), {'A', 'B', 'C'})
+        self.assertTrue(m.is_accepted('1'))
+
+        m.remove_transition('A', '1', 'C')
+        m.remove_transition('A', '0', 'A')
+        self.assertEqual(m.transitions, {('A', '0'): {'B'}})
+        self.assertEqual(m.enabled_symbols('A'), {'0'})
+        self.assertEqual(m.next_states('A'), {'B'})
+        self.assertEqual(m.enabled_symbols('B'), set())
+        self.assertFalse(m.is_accepted('1'))
+
+    def test_direct_transition_changes(self):
+        m = FSM()
+        m.states = {'A', 'B'}
+        m.initial_state = 'A'
+        m.final_states = {'B'}
+        m.transitions.setdefault(('A', 'x'), set()).add('B')
+        m.transitions[('B', 'y')] = {'A'}
+        self.assertEqual(m.next_states('A'), {'B'})
+        self.assertTrue(m.is_accepted('x'))
+        self.assertTrue(m.is_accepted('x y x'))
+        self.assertEqual(m.is_accepted_batch(['x', 'x y x', 'y'])[0], [True, True, False])
+
+        del m.transitions[('B', 'y')]
+        self.assertEqual(m.outgoing('B'), {})
+        self.assertEqual(m.transitions.pop(('A', 'x')), {'B'})
+        self.assertEqual(m.next_states('A'), set())
+
+        m.transitions.update({('A', 'x'): {'A'}})
+        m.transitions |= {('A', 'y'): {'B'}}
+        self.assertEqual(m.outgoing('A'), {'x': {'A'}, 'y': {'B'}})
+        m_copy = pickle.loads(pickle.dumps(m))
+        self.assertEqual(m_copy.outgoing('A'), {'x': {'A'}, 'y': {'B'}})
+        self.assertIs(m_copy.outgoing('A')['x'], m_copy.transitions[('A', 'x')])
+        m.transitions.clear()
+        self.assertEqual(m.outgoing('A'), {})
+
+    def test_batch_after_in_place_changes(self):
+        m = FSM()
+        m.states = {'A', 'B'}
+        m.initial_state = 'A'
+        m.final_states = {'B'}
+        m.add_transition('A', 'x', 'B')
+        self.assertEqual(m.is_accepted_batch(['x', 'y'])[0], [True, False])
+        m.transitions.setdefault(('A', 'y'), set()).add('B')
+        self.assertTrue(m.is_accepted('y'))
+        self.assertEqual(m.is_accepted_batch(['x', 'y'])[0], [True, True])
+        m.transitions[('A', 'x')] = {'A'}
+        self.assertEqual(m.is_accepted_batch(['x', 'y', 'x y'])[0], [False, True, True])
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import time
+import unittest
+
+from cache import InferenceCache
+from ktail import ktail
+
+
+class InferenceCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+        self.words = ['a b c', 'a b d', 'a b b c', 'b c']
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_digest(self):
+        digest = InferenceCache.digest(self.words)
+        self.assertEqual(InferenceCache.digest([word.split(' ') for word in self.words]), digest)
+        self.assertEqual(InferenceCache.digest(iter(self.words)), digest)
+        self.assertNotEqual(InferenceCache.digest(self.words, sep=','), digest)
+        self.assertNotEqual(InferenceCache.digest(self.words[::-1]), digest)
+        self.assertNotEqual(InferenceCache.digest(['a b', 'c']), InferenceCache.digest(['a', 'b c']))
+
+        # the symbols are hashed, rather than joined by the separator
+        self.assertNotEqual(InferenceCache.digest([['a b']]), InferenceCache.digest(['a b']))
+        self.assertEqual(InferenceCache.digest([['a b']]), InferenceCache.digest(['a b'], sep=','))
+        self.assertEqual(InferenceCache.digest(['a  b\tc'], sep=None), InferenceCache.digest([['a', 'b', 'c']]))
+
+    def test_get_put(self):
+        cache = InferenceCache(self.cache_dir)
+        key = InferenceCache.key('digest', 2)
+        self.assertEqual(key, InferenceCache.key('digest', 2))
+        self.assertNotEqual(key, InferenceCache.key('digest', 3))
+
+        self.assertIsNone(cache.get(key))
+        cache.put(key, {'a': frozenset({('b',)})})
+        self.assertEqual(cache.get(key), {'a': frozenset({('b',)})})
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache.clear()
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(cache.size(), 0)
+
+    def test_corrupted(self):
+        cache = InferenceCache(self.cache_dir)
+        key = InferenceCache.key('corrupted')
+        with open(os.path.join(self.cache_dir, key + '.pkl'), 'wb') as f:
+            f.write(b'not a pickle')
+        self.assertEqual(cache.get(key, 'default'), 'default')
+        self.assertEqual(cache.size(), 0)
+
+    def test_eviction(self):
+        cache = InferenceCache(self.cache_dir, max_size=2500)
+        for i in range(3):
+            cache.put(InferenceCache.key(i), bytes(1000))
+            time.sleep(0.01)  # so that the modification times differ
+
+        # the least recently used result is evicted
+        self.assertIsNone(cache.get(InferenceCache.key(0)))
+        self.assertIsNotNone(cache.get(InferenceCache.key(1)))
+        time.sleep(0.01)
+        cache.put(InferenceCache.key(3), bytes(1000))
+        self.assertIsNone(cache.get(InferenceCache.key(2)))
+        self.assertIsNotNone(cache.get(InferenceCache.key(1)))
+        self.assertLessEqual(cache.size(), 2500)
+
+        # the latest result is kept even if it is larger than the cache
+        cache.put(InferenceCache.key(4), bytes(5000))
+        self.assertIsNotNone(cache.get(InferenceCache.key(4)))
+
+    def test_ktail_cache(self):
+        expected = ktail(self.words, k=2)
+
+        cache = InferenceCache(self.cache_dir)
+        m = ktail(self.words, k=2, cache=cache)
+        self.assertEqual(m.transitions, expected.transitions)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)  # PTA, future map and model
+
+        reports = []
+        m = ktail(iter(self.words), k=2, cache=self.cache_dir, metrics=lambda stage, report: reports.append(stage))
+        self.assertEqual(m.transitions, expected.transitions)
+        self.assertEqual(m.final_states, expected.final_states)
+        self.assertEqual(reports, [])
+
+        # a different k reuses the PTA
+        cache = InferenceCache(self.cache_dir)
+        m = ktail(self.words, k=1, cache=cache)
+        self.assertEqual(m.transitions, ktail(self.words, k=1).transitions)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 5)
+
+        # different words do not
+        ktail(self.words[1:], k=2, cache=cache)
+        self.assertEqual(cache.hits, 1)
+
+    def test_ktail_cache_sep(self):
+        words = ['a  b c', 'a\tb d']
+        m = ktail(words, k=2, sep=None, cache=self.cache_dir)
+        self.assertEqual(m.transitions, ktail(words, k=2, sep=None).transitions)
+        self.assertEqual(ktail(words, k=2, sep=None, cache=self.cache_dir).transitions, m.transitions)
+
+        # a symbol containing the separator is not the same as the symbols around the separator
+        m = ktail([['a b']], k=1, cache=self.cache_dir)
+        self.assertEqual(m.alphabet, {'$', 'a b', '#'})
+        self.assertEqual(ktail(['a b'], k=1, cache=self.cache_dir).alphabet, {'$', 'a', 'b', '#'})
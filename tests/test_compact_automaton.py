@@ -0,0 +1,76 @@
+import unittest
+
+from compact_automaton import CompactAutomaton
+from finite_state_automaton import FiniteStateAutomaton as FSM
+from ktail import generate_PTA, generate_prefix_tree, ktail
+
+
+class CompactAutomatonTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.m = FSM()
+        self.m.alphabet = {'0', '1'}
+        self.m.states = {'A', 'B', 'C'}
+        self.m.initial_state = 'A'
+        self.m.final_states = {'C'}
+        self.m.transitions = {('A', '0'): {'A', 'B'}, ('A', '1'): {'B'}, ('B', '0'): {'C'}, ('B', '1'): {'A'},
+                              ('C', '1'): {'C'}}
+
+    def test_from_fsm(self):
+        c = CompactAutomaton.from_fsm(self.m)
+        self.assertEqual(c.symbols, ['0', '1'])
+        self.assertEqual(c.state_names, ['A', 'B', 'C'])
+        self.assertEqual(c.initial_state_id, 0)
+        self.assertEqual(list(c.final_flags), [0, 0, 1])
+        self.assertEqual(list(c.offsets), [0, 3, 5, 6])
+        self.assertEqual(list(c.edge_symbols), [0, 0, 1, 0, 1, 1])
+        self.assertEqual(list(c.edge_targets), [0, 1, 1, 2, 0, 2])
+
+    def test_fsm_api(self):
+        c = CompactAutomaton.from_fsm(self.m)
+        self.assertEqual(c.alphabet, self.m.alphabet)
+        self.assertEqual(c.states, self.m.states)
+        self.assertEqual(c.initial_state, self.m.initial_state)
+        self.assertEqual(c.final_states, self.m.final_states)
+        self.assertEqual(c.transitions, self.m.transitions)
+        self.assertEqual(c.next_states('A'), {'A', 'B'})
+        self.assertEqual(c.next_states('C'), {'C'})
+        self.assertEqual(str(c), str(c.to_fsm()))
+
+        for word in ['0 0', '1 0 1', '0 1 0 1 0 1 1', '1', '1 1', '0 2']:
+            self.assertEqual(c.is_accepted(word), self.m.is_accepted(word))
+
+    def test_ktail_models(self):
+        words = ['a b c', 'a b d', 'a b b b c']
+        for m in [generate_PTA(words), ktail(words, k=2)]:
+            c = CompactAutomaton.from_fsm(m)
+            self.assertEqual(c.to_fsm().transitions, m.transitions)
+            self.assertEqual(c.is_accepted('$ a b b b c #'), m.is_accepted('$ a b b b c #'))
+            self.assertEqual(c.is_accepted('$ a b c b #'), m.is_accepted('$ a b c b #'))
+
+    def test_generate_compact_prefix_tree(self):
+        words = ['a b c', 'a b d', 'a b b b c', 'a b c', ['b']]
+        m = generate_prefix_tree(words)
+        c = generate_prefix_tree(words, compact=True)
+        self.assertIsInstance(c, CompactAutomaton)
+        self.assertEqual(c.states, m.states)
+        self.assertEqual(c.initial_state, m.initial_state)
+        self.assertEqual(c.final_states, m.final_states)
+        self.assertEqual(c.transitions, m.transitions)
+        self.assertEqual(c.transition_counts, m.transition_counts)
+        self.assertEqual(c.final_counts, m.final_counts)
+
+    def test_ktail_compact(self):
+        words = ['a b c', 'a b d', 'a b b b c', 'a b c']
+        for k in (1, 2, 3):
+            m = ktail(words, k=k, weighted=True)
+            c = ktail(words, k=k, weighted=True, compact=True)
+            self.assertIsInstance(c, CompactAutomaton)
+            self.assertEqual(len(c.state_names), len(m.states))
+            self.assertEqual(sorted(c.edge_counts), sorted(m.transition_counts.values()))
+            words_checked = ['$ a b c #', '$ a b b c #', '$ a b #', '$ b #']
+            for word in words_checked:
+                self.assertEqual(c.is_accepted(word), m.is_accepted(word))
+            self.assertEqual(c.is_accepted_batch(words_checked), m.is_accepted_batch(words_checked))
+            self.assertEqual(c.transition_probabilities(), m.transition_probabilities())
+            self.assertEqual(c.log_likelihood_batch(words_checked), m.log_likelihood_batch(words_checked))
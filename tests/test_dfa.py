@@ -0,0 +1,93 @@
+import unittest
+
+from dfa import LazyDFA, determinize, minimize, shared_prefix_paths
+from finite_state_automaton import FiniteStateAutomaton as FSM
+from ktail import ktail
+
+
+class LazyDFATestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.m = FSM()
+        self.m.alphabet = {'0', '1'}
+        self.m.states = {'A', 'B', 'C'}
+        self.m.initial_state = 'A'
+        self.m.final_states = {'C'}
+        self.m.transitions = {('A', '0'): {'A', 'B'}, ('A', '1'): {'B'}, ('B', '0'): {'C'}, ('B', '1'): {'A'},
+                              ('C', '1'): {'C'}}
+        self.words = ['0 0', '1 0', '1 0 1', '0 0 1 1 1 1', '1 1 0 0', '0 1 0 1 0 1 0', '0 0 0 0 1 0 0 0 1 0 1 0 1 1',
+                      '1', '0', '1 1', '1 1 1 1 1 1 1', '1 0 0', '1 0 2', '1 0 1 0', '', '0 0']
+
+    def test_lazy_dfa(self):
+        dfa = LazyDFA(self.m)
+        self.assertEqual(dfa.subsets[dfa.initial], {'A'})
+        state_id = dfa.step(dfa.initial, '0')
+        self.assertEqual(dfa.subsets[state_id], {'A', 'B'})
+        self.assertEqual(dfa.step(dfa.initial, '0'), state_id)
+        self.assertTrue(dfa.accepting[dfa.step(state_id, '0')])
+        self.assertEqual(dfa.run(['1', '0', '0']), (LazyDFA.DEAD, 2))
+        self.assertEqual(dfa.run(['1', '0', '1'])[1], None)
+
+    def test_is_accepted_batch(self):
+        accepted, rejected_at = self.m.is_accepted_batch(self.words)
+        self.assertEqual(accepted, [self.m.is_accepted(word) for word in self.words])
+        self.assertEqual(rejected_at[self.words.index('1 0')], None)
+        self.assertEqual(rejected_at[self.words.index('1')], 1)
+        self.assertEqual(rejected_at[self.words.index('1 0 0')], 2)
+        self.assertEqual(rejected_at[self.words.index('1 0 2')], 2)
+        self.assertEqual(rejected_at[self.words.index('1 0 1 0')], 3)
+        self.assertEqual(self.m.is_accepted_batch([['1', '0'], ('1', '1')]), ([True, False], [None, 2]))
+
+    def test_is_accepted_batch_after_changes(self):
+        self.assertEqual(self.m.is_accepted_batch(['1 0 0'])[0], [False])
+        self.m.add_transition('C', '0', 'C')
+        self.assertEqual(self.m.is_accepted_batch(['1 0 0'])[0], [True])
+        self.m.final_states = {'B'}
+        self.assertEqual(self.m.is_accepted_batch(['1 0 0', '1'])[0], [False, True])
+
+    def test_is_accepted_batch_workers(self):
+        self.assertEqual(self.m.is_accepted_batch(self.words, workers=2), self.m.is_accepted_batch(self.words))
+
+    def test_shared_prefix_paths(self):
+        traces = ['abd', 'ab', 'xyz', 'abc', 'xyzw']
+        steps = []
+
+        def step(value, symbol):
+            steps.append(symbol)
+            return value + symbol
+
+        paths = {index: list(path) for index, path in shared_prefix_paths(traces, '', step, stop=lambda v: 'y' in v)}
+        self.assertEqual(paths, {0: ['', 'a', 'ab', 'abd'], 1: ['', 'a', 'ab'], 2: ['', 'x', 'xy'],
+                                 3: ['', 'a', 'ab', 'abc'], 4: ['', 'x', 'xy']})
+        self.assertEqual(steps, ['a', 'b', 'c', 'd', 'x', 'y'])
+
+    def test_determinize(self):
+        m = determinize(self.m)
+        self.assertEqual(m.is_accepted_batch(self.words)[0], self.m.is_accepted_batch(self.words)[0])
+        self.assertTrue(all(len(next_states) == 1 for next_states in m.transitions.values()))
+
+    def test_minimize(self):
+        m = minimize(self.m)
+        self.assertEqual(m.is_accepted_batch(self.words)[0], self.m.is_accepted_batch(self.words)[0])
+        self.assertTrue(all(len(next_states) == 1 for next_states in m.transitions.values()))
+        self.assertLessEqual(len(m.states), len(determinize(self.m).states))
+
+        # two redundant branches accepting 'a b' and 'a c'
+        m = FSM()
+        m.alphabet = {'a', 'b', 'c'}
+        m.states = {'s0', 's1', 's2', 's3', 's4'}
+        m.initial_state = 's0'
+        m.final_states = {'s3', 's4'}
+        m.transitions = {('s0', 'a'): {'s1', 's2'}, ('s1', 'b'): {'s3'}, ('s2', 'b'): {'s4'}, ('s2', 'c'): {'s4'}}
+        m = minimize(m)
+        self.assertEqual(len(m.states), 3)
+        self.assertEqual(m.is_accepted_batch(['a b', 'a c', 'a', 'a b c', 'b'])[0], [True, True, False, False, False])
+
+    def test_ktail_minimize(self):
+        words = ['a b c', 'a b b c', 'a c', 'b c', 'b b b c', 'a a c']
+        for k in (1, 2, 3):
+            m = ktail(words, k)
+            m_min = ktail(words, k, minimize=True)
+            self.assertLessEqual(len(m_min.states), len(m.states))
+            test_words = [f'$ {word} #' for word in words + ['a', 'c', 'a b', 'b a c', 'a b b b c']]
+            self.assertEqual(m_min.is_accepted_batch(test_words)[0], m.is_accepted_batch(test_words)[0])
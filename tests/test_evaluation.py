@@ -0,0 +1,67 @@
+import unittest
+
+from evaluation import evaluate, k_fold_splits, sample_words
+from finite_state_automaton import FiniteStateAutomaton as FSM
+from ktail import ktail
+
+
+class EvaluationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.words = ['open close', 'open read close', 'open write close', 'open read read close',
+                      'open read write close', 'open write read close', 'open write write close',
+                      'open read read read close', 'open read write write close', 'open write read read close']
+
+        # the ground truth: open (read | write)* close
+        self.ground_truth = FSM()
+        self.ground_truth.alphabet = {'open', 'read', 'write', 'close'}
+        self.ground_truth.states = {'s0', 's1', 's2'}
+        self.ground_truth.initial_state = 's0'
+        self.ground_truth.final_states = {'s2'}
+        self.ground_truth.transitions = {('s0', 'open'): {'s1'}, ('s1', 'read'): {'s1'}, ('s1', 'write'): {'s1'},
+                                         ('s1', 'close'): {'s2'}}
+
+    def test_k_fold_splits(self):
+        splits = k_fold_splits(self.words, folds=3, seed=1)
+        self.assertEqual(len(splits), 3)
+        self.assertEqual(sorted(word for _, test_words in splits for word in test_words), sorted(self.words))
+        for training_words, test_words in splits:
+            self.assertIn(len(test_words), (3, 4))
+            self.assertEqual(sorted(training_words + test_words), sorted(self.words))
+        self.assertEqual(k_fold_splits(self.words, folds=3, seed=1), splits)
+
+    def test_sample_words(self):
+        m = ktail(self.words, k=2)
+        words = sample_words(m, 100, seed=1, max_length=8)
+        self.assertEqual(len(words), 100)
+        self.assertTrue(all(m.is_accepted(' '.join(word)) for word in words))
+        self.assertTrue(all(len(word) <= 8 for word in words))
+        self.assertEqual(sample_words(m, 100, seed=1, max_length=8), words)
+
+        # no word is accepted
+        m.final_states = set()
+        self.assertEqual(sample_words(m, 10), [])
+
+    def test_evaluate(self):
+        report = evaluate(self.words, [1, 3], folds=5, ground_truth=self.ground_truth, samples=200)
+        self.assertEqual(sorted(report.keys()), [1, 3])
+        self.assertEqual(len(report[1]['folds']), 5)
+        for k in (1, 3):
+            for key in ('recall', 'precision', 'f1'):
+                self.assertTrue(0 <= report[k][key] <= 1)
+            self.assertGreater(report[k]['states'], 0)
+        self.assertEqual(report[1]['precision'], 1.0)  # 1-tail generalizes the loop correctly
+        self.assertGreaterEqual(report[1]['recall'], report[3]['recall'])
+
+        # the precision against the training words is a lower bound
+        report_pta = evaluate(self.words, [1, 3], folds=5, samples=200)
+        self.assertLessEqual(report_pta[1]['precision'], report[1]['precision'])
+
+    def test_evaluate_workers(self):
+        def accuracy(report):
+            return {k: [(result['recall'], result['precision'], result['states']) for result in results['folds']]
+                    for k, results in report.items()}
+
+        report = evaluate(self.words, [1, 2], folds=3, ground_truth=self.ground_truth, samples=50)
+        report_workers = evaluate(self.words, [1, 2], folds=3, ground_truth=self.ground_truth, samples=50, workers=2)
+        self.assertEqual(accuracy(report_workers), accuracy(report))
@@ -0,0 +1,74 @@
+import io
+import json
+import unittest
+
+from compact_automaton import CompactAutomaton
+from export import write_dot, write_json
+from finite_state_automaton import FiniteStateAutomaton as FSM
+from ktail import generate_prefix_tree
+
+
+class ExportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.m = FSM()
+        self.m.alphabet = {'0', '1', '2'}
+        self.m.states = {'A', 'B', 'C', 'D'}
+        self.m.initial_state = 'A'
+        self.m.final_states = {'C'}
+        self.m.transitions = {('A', '0'): {'A', 'B'}, ('A', '1'): {'B'}, ('B', '0'): {'C'}, ('B', '1'): {'A'},
+                              ('C', '1'): {'C'}, ('C', '2'): {'D'}}
+
+    def test_write_dot(self):
+        out = io.StringIO()
+        write_dot(self.m, out)
+        dot = out.getvalue()
+        self.assertTrue(dot.startswith('digraph finite_state_machine {\n'))
+        self.assertTrue(dot.endswith('}\n'))
+        self.assertIn('\tstart -> n0\n', dot)
+        self.assertIn('\tn0 [label="A" shape=circle]\n', dot)
+        self.assertIn('\tn0 -> n1 [label="0, 1"]\n', dot)  # parallel edges are merged
+        self.assertIn('\tn0 -> n0 [label="0"]\n', dot)
+        self.assertIn('\tn2 [label="C" shape=doublecircle]\n', dot)
+        self.assertEqual(dot.count(' -> '), 7)
+        self.assertNotIn('collapsed', dot)
+
+        out = io.StringIO()
+        write_dot(CompactAutomaton.from_fsm(self.m), out)
+        self.assertEqual(out.getvalue(), dot)
+
+    def test_write_dot_truncated(self):
+        out = io.StringIO()
+        write_dot(self.m, out, max_depth=1)
+        dot = out.getvalue()
+        self.assertNotIn('label="C"', dot)
+        self.assertIn('\tn1 -> collapsed [label="0"]\n', dot)
+        self.assertIn('\tcollapsed [label="..." shape=none]\n', dot)
+
+        out = io.StringIO()
+        write_dot(self.m, out, max_depth=1, collapse=False)
+        self.assertNotIn('collapsed', out.getvalue())
+
+    def test_write_dot_collapsed_counts(self):
+        # the transitions with the same symbol to several left-out states make a single label with their total count
+        m = generate_prefix_tree(['a b', 'a c', 'a b', 'x y'])
+        m.add_transition('s1', 'a', 's5', count=1)
+        out = io.StringIO()
+        write_dot(m, out, max_states=2)
+        self.assertIn('\tn1 -> collapsed [label="a (4), x (1)"]\n', out.getvalue())
+
+    def test_write_json(self):
+        m = generate_prefix_tree(['a b', 'a b', 'a c', 'a b c'])
+        out = io.StringIO()
+        write_json(m, out, max_states=4)
+        graph = json.loads(out.getvalue())
+        self.assertEqual(graph['initial_state'], '_INIT_')
+        self.assertEqual([node['id'] for node in graph['nodes']], ['_INIT_', 's1', 's2', 's3'])
+        self.assertIn({'source': 's1', 'target': 's2', 'symbols': ['a'], 'counts': [4]}, graph['edges'])
+        self.assertIn({'source': 's3', 'target': '...', 'symbols': ['#', 'c'], 'counts': [2, 1]}, graph['edges'])
+
+        out = io.StringIO()
+        write_json(m, out, max_label_length=3)
+        graph = json.loads(out.getvalue())
+        self.assertEqual(len(graph['nodes']), len(m.states))
+        self.assertIn({'id': '_FINAL_', 'label': '...', 'final': True}, graph['nodes'])
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from fingerprint import EMPTY, fingerprint_future_mapping
+from ktail import generate_PTA, k_future_mapping, ktail
+
+
+class FingerprintTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.words = [
+            'a b c',
+            'a b d',
+            'a b b c',
+            'c a',
+            'a b d',
+            'b'
+        ]
+
+    def test_fingerprint_future_mapping(self):
+        for k in range(1, 6):
+            expected = k_future_mapping(generate_PTA(self.words), k)
+            fingerprints = fingerprint_future_mapping(self.words, k, verify=True, shard_size=4)
+            self.assertEqual(fingerprints.materialize(), expected)
+            self.assertEqual(len(fingerprints.future_map), len(expected))
+            self.assertTrue(all(isinstance(future, int) for future in fingerprints.future_map))
+            self.assertEqual(fingerprints.labels[fingerprints.initial_future], '$')
+            self.assertEqual(fingerprints.future(EMPTY), frozenset())
+
+        fingerprints = fingerprint_future_mapping([['x', 'y']], 1)
+        self.assertEqual(fingerprints.materialize(), k_future_mapping(generate_PTA(['x y']), 1))
+        self.assertEqual(fingerprint_future_mapping([], 2).future_map, dict())
+
+    def test_spill(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with fingerprint_future_mapping(self.words, 3, spill=os.path.join(tmp_dir, 'futures')) as fingerprints:
+                self.assertEqual(fingerprints.materialize(), k_future_mapping(generate_PTA(self.words), 3))
+
+    def test_verify(self):
+        # with a hash depending only on the lengths of the k-grams, the futures of the same size collide
+        with mock.patch('fingerprint._extend', lambda hashes, lane, symbol_ids: hashes + 1):
+            fingerprint_future_mapping(self.words, 2)
+            with self.assertRaises(ValueError):
+                fingerprint_future_mapping(self.words, 2, verify=True)
+            with self.assertRaises(ValueError):
+                ktail(self.words, k=2, engine='fingerprint', fingerprint_options={'verify': True})
+
+    def test_ktail_fingerprint_engine(self):
+        m = ktail(self.words, k=2)
+        m_fingerprint = ktail(iter(self.words), k=2, engine='fingerprint')
+        self.assertEqual(len(m_fingerprint.states), len(m.states))
+        self.assertEqual(len(m_fingerprint.transitions), len(m.transitions))
+        self.assertTrue(m_fingerprint.is_accepted('$ a b b c #'))
+        self.assertFalse(m_fingerprint.is_accepted('$ c #'))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            m_spilled = ktail(self.words, k=2, engine='fingerprint',
+                              fingerprint_options={'verify': True, 'spill': os.path.join(tmp_dir, 'futures')})
+        self.assertEqual(m_spilled.transitions, m_fingerprint.transitions)
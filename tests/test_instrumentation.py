@@ -0,0 +1,67 @@
+import io
+import logging
+import tracemalloc
+import unittest
+from contextlib import redirect_stdout
+
+from instrumentation import log_metrics, size_histogram
+from ktail import ktail
+
+
+class InstrumentationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.words = [
+            'a b c',
+            'a b d',
+            'a b e'
+        ]
+
+    def test_ktail_metrics(self):
+        reports = []
+        with redirect_stdout(io.StringIO()) as stdout:
+            m = ktail(self.words, k=2, metrics=lambda stage, report: reports.append((stage, report)))
+        self.assertEqual(stdout.getvalue(), '')
+
+        self.assertEqual([stage for stage, _ in reports], ['pta', 'futures', 'mapping', 'inference', 'renaming'])
+        for stage, report in reports:
+            self.assertGreaterEqual(report['wall_time'], 0)
+            self.assertNotIn('peak_memory', report)
+
+        reports = dict(reports)
+        self.assertEqual(reports['pta']['states'], 14)
+        self.assertEqual(reports['pta']['transitions'], 15)
+        self.assertEqual(reports['futures']['states'], 14)
+        self.assertEqual(reports['futures']['distinct_futures'], 10)
+        self.assertEqual(sum(reports['futures']['future_size_histogram'].values()), 10)
+        self.assertAlmostEqual(reports['futures']['future_hit_rate'], 1 - 10 / 14)
+        self.assertEqual(reports['mapping']['distinct_futures'], 10)
+        self.assertEqual(reports['inference']['states'], len(m.states))
+        self.assertEqual(reports['renaming']['transitions'], reports['inference']['transitions'])
+
+    def test_ktail_trace_memory(self):
+        reports = []
+        ktail(self.words, k=2, metrics=lambda stage, report: reports.append(report), trace_memory=True)
+        self.assertEqual(len(reports), 5)
+        for report in reports:
+            self.assertGreaterEqual(report['wall_time'], 0)
+            self.assertGreaterEqual(report['peak_memory'], 0)
+        self.assertGreater(reports[0]['peak_memory'], 0)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_ktail_metrics_engines(self):
+        for options, stages in [({'prefix_tree': True}, ['pta', 'mapping', 'inference', 'renaming']),
+                                ({'engine': 'kgram'}, ['mapping', 'inference', 'renaming'])]:
+            reports = []
+            ktail(self.words, k=2, metrics=lambda stage, report: reports.append((stage, report)), **options)
+            self.assertEqual([stage for stage, _ in reports], stages)
+
+    def test_log_metrics(self):
+        with self.assertLogs('instrumentation', level=logging.INFO) as logs:
+            ktail(self.words, k=2, metrics=log_metrics())
+        self.assertEqual(len(logs.records), 5)
+        self.assertTrue(logs.output[0].startswith('INFO:instrumentation:pta: {'))
+
+    def test_size_histogram(self):
+        self.assertEqual(size_histogram([frozenset(), frozenset({1, 2}), frozenset({3, 4}), frozenset({5})]),
+                         {0: 1, 1: 1, 2: 2})
@@ -0,0 +1,38 @@
+import unittest
+
+from kgram_engine import kgram_future_mapping
+from ktail import generate_PTA, k_future_mapping, ktail
+
+
+class KGramEngineTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.words = [
+            'a b c',
+            'a b d',
+            'a b b c',
+            'c a',
+            'a b d',
+            'b'
+        ]
+
+    def test_kgram_future_mapping(self):
+        for k in range(1, 5):
+            self.assertEqual(kgram_future_mapping(self.words, k), k_future_mapping(generate_PTA(self.words), k))
+        self.assertEqual(kgram_future_mapping([], 2), dict())
+        self.assertEqual(kgram_future_mapping([['x', 'y']], 1), k_future_mapping(generate_PTA(['x y']), 1))
+
+    def test_ktail_kgram_engine(self):
+        m = ktail(self.words, k=2)
+        m_kgram = ktail(iter(self.words), k=2, engine='kgram')
+        self.assertEqual(len(m_kgram.states), len(m.states))
+        self.assertEqual(len(m_kgram.transitions), len(m.transitions))
+        self.assertTrue(m_kgram.is_accepted('$ a b b c #'))
+        self.assertFalse(m_kgram.is_accepted('$ c #'))
+
+    def test_kgram_future_mapping_counts(self):
+        for k in range(1, 4):
+            counts, counts_pta = dict(), dict()
+            kgram_future_mapping(self.words, k, counts=counts)
+            k_future_mapping(generate_PTA(self.words), k, counts=counts_pta)
+            self.assertEqual(counts, counts_pta)
@@ -0,0 +1,63 @@
+import math
+import unittest
+
+from finite_state_automaton import FiniteStateAutomaton as FSM
+from ktail import generate_PTA, initial_symbol, ktail
+
+
+class LikelihoodTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.words = ['a b', 'a b', 'a b b', 'a c']
+
+    def test_weighted_ktail(self):
+        m = ktail(self.words, k=1, weighted=True)
+        for (state, symbol), next_states in m.transitions.items():
+            for next_state in next_states:
+                self.assertGreater(m.transition_counts[(state, symbol, next_state)], 0)
+        self.assertEqual(sum(m.final_counts.values()), len(self.words))
+        self.assertEqual(sum(count for (state, symbol, _), count in m.transition_counts.items()
+                             if symbol == initial_symbol), len(self.words))
+
+        # the counts do not depend on the engine
+        words = ['a b c', 'a b d', 'a b b c', 'c a', 'a b d', 'b', 'a b c']
+        for k in (1, 2, 3):
+            m = ktail(words, k=k, weighted=True)
+            for kwargs in ({'prefix_tree': True}, {'engine': 'kgram'}):
+                m_other = ktail(words, k=k, weighted=True, **kwargs)
+                self.assertEqual(sorted(m_other.transition_counts.values()), sorted(m.transition_counts.values()))
+                self.assertEqual(sorted(m_other.final_counts.values()), sorted(m.final_counts.values()))
+
+    def test_transition_probabilities(self):
+        m = ktail(self.words, k=1, weighted=True)
+        probabilities = m.transition_probabilities()
+        self.assertEqual(len(probabilities), sum(len(next_states) for next_states in m.transitions.values()))
+        for state in m.states:
+            # the probabilities of the transitions leaving a state and of stopping there sum to 1
+            total = sum(p for (src, _, _), p in probabilities.items() if src == state)
+            if state in m.final_states:
+                self.assertLess(total, 1)
+            elif total:
+                self.assertAlmostEqual(total, 1)
+
+        # without counts, the transitions leaving a state have the same probability (one chain per word in the PTA)
+        m = generate_PTA(['a b', 'a c'])
+        m.transition_counts = dict()
+        probabilities = FSM.transition_probabilities(m)
+        self.assertEqual(sorted(probabilities.values()), [0.5, 0.5] + [1.0] * 6)
+
+    def test_log_likelihood_batch(self):
+        m = ktail(self.words, k=1, weighted=True)
+        words = ['$ a b #', '$ a c #', '$ a b b #', ['$', 'a', 'b', 'b', 'b', '#'], '$ a d #', '$ a #', '']
+        likelihoods = [math.exp(log_likelihood) for log_likelihood in m.log_likelihood_batch(words)]
+        for likelihood, expected in zip(likelihoods, [9 / 16, 1 / 4, 9 / 64, 9 / 256, 0, 0, 0]):
+            self.assertAlmostEqual(likelihood, expected)
+
+        # the order of the words does not change their log-likelihoods
+        self.assertEqual(m.log_likelihood_batch(words[::-1]), m.log_likelihood_batch(words)[::-1])
+        self.assertEqual(m.log_likelihood_batch([]), [])
+
+        # long words do not underflow
+        log_likelihood = m.log_likelihood_batch(['$ a ' + 'b ' * 2000 + '#'])[0]
+        self.assertTrue(math.isfinite(log_likelihood))
+        self.assertAlmostEqual(log_likelihood, math.log(9 / 16) + 1999 * math.log(1 / 4))
@@ -1,7 +1,8 @@
 import unittest
 
 from finite_state_automaton import FiniteStateAutomaton as FSM
-from ktail import generate_PTA, get_k_future, k_future_mapping, rename_states, ktail
+from ktail import generate_PTA, generate_prefix_tree, get_k_future, k_futures, k_future_mapping, \
+    prefix_tree_future_mapping, infer_model, rename_states, ktail, ktail_sweep, IncrementalKTail
 
 
 class TestMain(unittest.TestCase):
@@ -21,6 +22,25 @@ class TestMain(unittest.TestCase):
                                          ('s9', 'e'): {'s10'},  ('s5', '#'): {'_FINAL_'},  ('s10', '#'): {'_FINAL_'}})
         # m.draw('PTA-test')
 
+    def test_generate_prefix_tree(self):
+        words = [
+            'a b c d',
+            'a b c e',
+            'a b c d'
+        ]
+        m = generate_prefix_tree(words)
+        self.assertEqual(m.alphabet, {'a', 'b', 'c', 'd', 'e', '$', '#'})
+        self.assertEqual(m.states, {'_INIT_', '_FINAL_', 's1', 's2', 's3', 's4', 's5', 's6'})
+        self.assertEqual(m.initial_state, '_INIT_')
+        self.assertEqual(m.final_states, {'_FINAL_'})
+        self.assertEqual(m.transitions, {('_INIT_', '$'): {'s1'}, ('s1', 'a'): {'s2'}, ('s2', 'b'): {'s3'},
+                                         ('s3', 'c'): {'s4'}, ('s4', 'd'): {'s5'}, ('s4', 'e'): {'s6'},
+                                         ('s5', '#'): {'_FINAL_'}, ('s6', '#'): {'_FINAL_'}})
+        self.assertEqual(m.transition_counts, {('_INIT_', '$', 's1'): 3, ('s1', 'a', 's2'): 3, ('s2', 'b', 's3'): 3,
+                                               ('s3', 'c', 's4'): 3, ('s4', 'd', 's5'): 2, ('s4', 'e', 's6'): 1,
+                                               ('s5', '#', '_FINAL_'): 2, ('s6', '#', '_FINAL_'): 1})
+        self.assertEqual(m.final_counts, {'_FINAL_': 3})
+
     def test_get_k_future(self):
         m = FSM()
         m.alphabet = {'ax', 'bx', 'cx', 'dx', 'ex'}
@@ -51,6 +71,26 @@ class TestMain(unittest.TestCase):
         self.assertEqual(get_k_future(m, 2, 's3'), {('cx',)})
         self.assertEqual(get_k_future(m, 1, 's4'), set())
 
+    def test_k_futures(self):
+        m = FSM()
+        m.alphabet = {'ax', 'bx', 'cx', 'dx', 'ex'}
+        m.states = {'s1', 's2', 's3', 's4', 's5', 's6'}
+        m.initial_state = 's1'
+        m.final_states = {'s4', 's6'}
+        m.transitions = {
+            ('s1', 'ax'): {'s2', 's5'},
+            ('s2', 'bx'): {'s3'},
+            ('s3', 'cx'): {'s4'},
+            ('s5', 'dx'): {'s5'},
+            ('s5', 'ex'): {'s6'}
+        }
+        for k in range(1, 5):
+            futures = k_futures(m, k)
+            self.assertEqual(set(futures.keys()), m.states)
+            for state in m.states:
+                self.assertEqual(futures[state], get_k_future(m, k, state))
+        self.assertEqual(k_futures(m, 2, ['s3'])['s3'], {('cx',)})
+
     def test_k_future_mapping(self):
         m = FSM()
         m.alphabet = {'$', '0', '1', '#'}
@@ -79,6 +119,26 @@ class TestMain(unittest.TestCase):
             frozenset({('#',)}): {frozenset()},
             frozenset({('$',)}): {frozenset({('1',)}), frozenset({('0',)})}})
 
+    def test_k_future_mapping_undeclared_target(self):
+        # a target state that is neither declared nor the source of a transition
+        m = FSM()
+        m.states = {'A'}
+        m.initial_state = 'A'
+        m.transitions = {('A', 'x'): {'B'}}
+        self.assertEqual(k_future_mapping(m, 2), {frozenset({('x',)}): {frozenset()}})
+
+    def test_prefix_tree_future_mapping(self):
+        words = [
+            'a b',
+            'a c',
+            'a b b c',
+            'b a b'
+        ]
+        for k in range(1, 5):
+            self.assertEqual(prefix_tree_future_mapping(generate_prefix_tree(words), k),
+                             k_future_mapping(generate_PTA(words), k))
+        self.assertEqual(prefix_tree_future_mapping(generate_prefix_tree([]), 2, counts=dict()), dict())
+
     def test_rename_states(self):
         m = FSM()
         m.alphabet = {'e', '0', '1'}
@@ -110,8 +170,50 @@ class TestMain(unittest.TestCase):
              ('q8', '1'): {'q9'}}
         )
 
+        # the new names of the states of a DFA do not depend on their old names
+        m = FSM()
+        m.initial_state = 'z'
+        m.final_states = {'a'}
+        m.transitions = {('z', 'x'): {'b'}, ('z', 'y'): {'a'}, ('b', 'y'): {'a'}, ('a', 'x'): {'z'}}
+        m_other = FSM()
+        m_other.initial_state = 'a'
+        m_other.final_states = {'c'}
+        m_other.transitions = {('a', 'x'): {'b'}, ('a', 'y'): {'c'}, ('b', 'y'): {'c'}, ('c', 'x'): {'a'}}
+        self.assertEqual(rename_states(m).transitions, rename_states(m_other).transitions)
+        self.assertEqual(rename_states(m).transitions,
+                         {('q0', 'x'): {'q1'}, ('q0', 'y'): {'q2'}, ('q1', 'y'): {'q2'}, ('q2', 'x'): {'q0'}})
+
     def test_infer_model(self):
-        pass  # FIXME
+        future_init = frozenset({('$',)})
+        future_0 = frozenset({('0',)})
+        future_1 = frozenset({('1',)})
+        future_final = frozenset({('#',)})
+        future_map = {
+            future_init: {future_0, future_1},
+            future_0: {future_0, future_1},
+            future_1: {future_final},
+            future_final: {frozenset()}
+        }
+        state_futures = dict()
+        m = infer_model(future_map, state_futures=state_futures)
+        self.assertEqual(m.alphabet, {'$', '0', '1', '#'})
+        self.assertEqual(m.states, set(state_futures.keys()))
+        self.assertEqual(len(m.states), 5)
+        self.assertEqual(state_futures[m.initial_state], future_init)
+        self.assertEqual({state_futures[state] for state in m.final_states}, {frozenset()})
+        self.assertTrue(all(len(state) <= 3 for state in m.states))
+        self.assertTrue(m.is_accepted('$ 1 #'))
+        self.assertTrue(m.is_accepted('$ 0 0 1 #'))
+        self.assertFalse(m.is_accepted('$ 0 #'))
+        self.assertEqual(infer_model(future_map).transitions, m.transitions)
+
+        # the state names do not depend on the order of the future map
+        reversed_map = {future: set(reversed(list(futures_dst))) for future, futures_dst in reversed(future_map.items())}
+        m_reversed = infer_model(reversed_map)
+        self.assertEqual(m_reversed.transitions, m.transitions)
+        self.assertEqual(m_reversed.initial_state, m.initial_state)
+        self.assertEqual(m_reversed.final_states, m.final_states)
+        self.assertEqual(m.initial_state, 'f2')  # the sorted sets of k-sequences are {}, {('#',)}, {('$',)}, ...
 
     def test_ktail(self):
         k = 2
@@ -140,3 +242,65 @@ class TestMain(unittest.TestCase):
         self.assertTrue(m.is_accepted("$ hello world #"))
         self.assertTrue(m.is_accepted("$ hello hello world #"))
         self.assertTrue(m.is_accepted("$ hello hello hello hello hello world #"))
+
+    def test_ktail_prefix_tree(self):
+        k = 2
+        words = [
+            'a b c',
+            'a b d',
+            'a b e',
+            'a b c'
+        ]
+        m = ktail(words=words, k=k)
+        m_tree = ktail(words=words, k=k, prefix_tree=True)
+        self.assertEqual(m.alphabet, m_tree.alphabet)
+        self.assertEqual(len(m.states), len(m_tree.states))
+        self.assertEqual(len(m.transitions), len(m_tree.transitions))
+        self.assertTrue(m_tree.is_accepted('$ a b c #'))
+        self.assertTrue(m_tree.is_accepted('$ a b e #'))
+        self.assertFalse(m_tree.is_accepted('$ a c #'))
+
+    def test_incremental_ktail(self):
+        words = [
+            'a b c',
+            'a b d',
+            'a b b c',
+            'c a',
+            'a b d'
+        ]
+        for k in range(1, 4):
+            incremental = IncrementalKTail(k)
+            for i in range(len(words)):
+                incremental.add_traces(words[i:i + 1])
+                self.assertEqual(incremental.future_map, k_future_mapping(generate_PTA(words[:i + 1]), k))
+
+            m = ktail(words, k=k)
+            self.assertEqual(len(incremental.model.states), len(m.states))
+            self.assertEqual(len(incremental.model.transitions), len(m.transitions))
+            self.assertTrue(incremental.model.is_accepted('$ a b b c #'))
+            self.assertFalse(incremental.model.is_accepted('$ b #'))
+
+        # modifying the returned future map does not change the next ones
+        incremental = IncrementalKTail(2)
+        incremental.add_traces(words[:2])
+        for futures_dst in incremental.future_map.values():
+            futures_dst.clear()
+        incremental.add_traces(words[2:])
+        self.assertEqual(incremental.future_map, k_future_mapping(generate_PTA(words), 2))
+
+    def test_ktail_sweep(self):
+        words = [
+            'a b c',
+            'a b d',
+            'a b b c',
+            'c a'
+        ]
+        results = ktail_sweep(iter(words), [3, 1, 2])
+        self.assertEqual(set(results.keys()), {1, 2, 3})
+        for k, (m_k, stats) in results.items():
+            m = ktail(words, k=k)
+            self.assertEqual(stats['states'], len(m.states))
+            self.assertEqual(stats['transitions'], sum(len(next_states) for next_states in m.transitions.values()))
+            self.assertGreaterEqual(stats['time'], 0)
+            self.assertEqual(len(m_k.transitions), len(m.transitions))
+            self.assertTrue(m_k.is_accepted('$ a b b c #'))
@@ -0,0 +1,85 @@
+import asyncio
+import unittest
+
+from ktail import ktail
+from monitor import ConformanceMonitor, Deviation
+
+
+class ConformanceMonitorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.m = ktail(['open read close', 'open write close', 'open read read write close'], k=2)
+
+    def test_feed(self):
+        deviations = []
+        monitor = ConformanceMonitor(self.m, on_deviation=deviations.append)
+        self.assertIsNone(monitor.feed('s1', 'open'))
+        self.assertIsNone(monitor.feed('s2', 'open'))
+        self.assertIsNone(monitor.feed('s1', 'read'))
+        self.assertIsNone(monitor.feed('s2', 'write'))
+        self.assertIsNone(monitor.feed('s2', 'close'))
+        self.assertEqual(monitor.feed('s1', 'open'), Deviation('s1', 2, 'open'))
+        self.assertIsNone(monitor.feed('s1', 'open'))  # each session deviates only once
+        self.assertEqual(monitor.sessions, 2)
+
+        self.assertIsNone(monitor.feed('s2', '#'))
+        self.assertIsNone(monitor.end('s1'))
+        self.assertEqual(monitor.sessions, 0)
+        self.assertEqual(deviations, [Deviation('s1', 2, 'open')])
+
+    def test_end(self):
+        monitor = ConformanceMonitor(self.m)
+        monitor.feed_batch([('s1', 'open'), ('s1', 'read'), ('s2', 'open'), ('s2', 'write'), ('s2', 'close')])
+        self.assertEqual(monitor.end('s1'), Deviation('s1', 2, None))
+        self.assertIsNone(monitor.end('s2'))
+        self.assertEqual(monitor.end('s3'), Deviation('s3', 0, None))  # an empty session
+
+    def test_feed_batch(self):
+        words = ['open read close', 'open close', 'read', 'open write write close', 'open read read write close']
+        events = [(i, event) for i, word in enumerate(words) for event in word.split(' ') + ['#']]
+        deviations = ConformanceMonitor(self.m).feed_batch(events)
+        rejected = [i for i, word in enumerate(words) if not self.m.is_accepted(f'$ {word} #')]
+        self.assertEqual(sorted(deviation.session_id for deviation in deviations), rejected)
+
+    def test_consume(self):
+        async def stream():
+            for event in [('s1', 'open'), ('s2', 'read'), ('s1', 'write'), ('s1', 'close'), ('s1', '#')]:
+                yield event
+
+        deviations = []
+        monitor = ConformanceMonitor(self.m, on_deviation=deviations.append)
+        self.assertEqual(asyncio.run(monitor.consume(stream())), 5)
+        self.assertEqual(deviations, [Deviation('s2', 0, 'read')])
+        self.assertEqual(monitor.sessions, 1)
+
+    def test_evict_idle(self):
+        now = [0.0]
+        evicted = []
+        monitor = ConformanceMonitor(self.m, idle_timeout=10, on_evict=evicted.append, clock=lambda: now[0])
+        monitor.feed('s1', 'open')
+        now[0] = 5
+        monitor.feed('s2', 'open')
+        now[0] = 12
+        monitor.feed('s2', 'read')
+        self.assertEqual(evicted, ['s1'])
+        self.assertEqual(monitor.evict_idle(now=30), ['s2'])
+        self.assertEqual(monitor.sessions, 0)
+
+    def test_no_start_and_end_symbols(self):
+        m = ktail(['a b', 'a b b'], k=1)
+        monitor = ConformanceMonitor(m, start_symbol=None, end_symbol=None)
+        self.assertEqual(monitor.feed('s1', 'a'), Deviation('s1', 0, 'a'))
+        self.assertIsNone(monitor.feed('s2', '$'))
+        self.assertIsNone(monitor.feed('s2', 'a'))
+        self.assertEqual(monitor.end('s2'), Deviation('s2', 2, None))
+
+    def test_dead_start_with_idle_timeout(self):
+        now = [0.0]
+        monitor = ConformanceMonitor(self.m, start_symbol='x', idle_timeout=10, clock=lambda: now[0])
+        self.assertEqual(monitor.feed('s1', 'open'), Deviation('s1', 0, 'open'))
+        now[0] = 5
+        self.assertEqual(monitor.feed('s2', 'open'), Deviation('s2', 0, 'open'))
+        self.assertIsNone(monitor.feed('s1', 'read'))
+        now[0] = 20
+        self.assertEqual(monitor.feed('s3', 'open'), Deviation('s3', 0, 'open'))  # s1 and s2 are evicted
+        self.assertEqual(monitor.sessions, 1)
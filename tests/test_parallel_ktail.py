@@ -0,0 +1,32 @@
+import unittest
+
+from ktail import generate_PTA, k_future_mapping, ktail
+from parallel_ktail import parallel_future_mapping, parallel_ktail
+
+
+class ParallelKTailTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.words = [
+            'a b c',
+            'a b d',
+            'a b b c',
+            'c a',
+            'a b d',
+            'b',
+            'a c c c b'
+        ]
+
+    def test_parallel_future_mapping(self):
+        for k in range(1, 4):
+            for shard_size in [1, 3, 100]:
+                self.assertEqual(parallel_future_mapping(self.words, k, workers=2, shard_size=shard_size),
+                                 k_future_mapping(generate_PTA(self.words), k))
+
+    def test_parallel_ktail(self):
+        m = ktail(self.words, k=2)
+        m_parallel = parallel_ktail(iter(self.words), k=2, workers=2, shard_size=2)
+        self.assertEqual(len(m_parallel.states), len(m.states))
+        self.assertEqual(len(m_parallel.transitions), len(m.transitions))
+        self.assertTrue(m_parallel.is_accepted('$ a c c c b #'))
+        self.assertFalse(m_parallel.is_accepted('$ c #'))
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from compact_automaton import CompactAutomaton
+from finite_state_automaton import FiniteStateAutomaton as FSM
+from ktail import ktail
+from likelihood import log_likelihood_batch
+from serialization import load, save
+
+
+class SerializationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.m = ktail(['a b c', 'a b d', 'a b b c', 'ü ß'], k=2)
+        self.words = ['$ a b c #', '$ a b b b c #', '$ a c #', '$ ü ß #', '$ ü #', 'x']
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assertSameFSM(self, m1, m2):
+        self.assertEqual(m1.alphabet, m2.alphabet)
+        self.assertEqual(m1.states, m2.states)
+        self.assertEqual(m1.initial_state, m2.initial_state)
+        self.assertEqual(m1.final_states, m2.final_states)
+        self.assertEqual(m1.transitions, m2.transitions)
+        for word in self.words:
+            self.assertEqual(m1.is_accepted(word), m2.is_accepted(word))
+
+    def test_binary(self):
+        path = os.path.join(self.tmp_dir.name, 'model.fsm')
+        save(self.m, path)
+        for use_mmap in [True, False]:
+            c = load(path, use_mmap=use_mmap)
+            self.assertIsInstance(c, CompactAutomaton)
+            self.assertSameFSM(c, self.m)
+            self.assertEqual(c.state_names[1:3], sorted(self.m.states)[1:3])
+            self.assertEqual(c.next_states(self.m.initial_state), self.m.next_states(self.m.initial_state))
+            del c
+
+    def test_json(self):
+        path = os.path.join(self.tmp_dir.name, 'model.json')
+        save(self.m, path)
+        m = load(path)
+        self.assertIsInstance(m, FSM)
+        self.assertSameFSM(m, self.m)
+
+        save(CompactAutomaton.from_fsm(self.m), path, fmt='json')
+        self.assertSameFSM(load(path), self.m)
+
+    def test_weighted(self):
+        m = ktail(['a b c', 'a b d', 'a b b c', 'a b c'], k=1, weighted=True)
+        words = ['a b c', 'a b b b d', 'a c']
+        for name in ['model.fsm', 'model.json']:
+            path = os.path.join(self.tmp_dir.name, name)
+            save(m, path)
+            loaded = load(path)
+            self.assertEqual(loaded.transition_counts, m.transition_counts)
+            self.assertEqual(loaded.final_counts, m.final_counts)
+            self.assertEqual(log_likelihood_batch(loaded, words), log_likelihood_batch(m, words))
+            del loaded
+
+    def test_empty_fsm(self):
+        path = os.path.join(self.tmp_dir.name, 'empty.fsm')
+        m = FSM()
+        m.states = {'A'}
+        m.initial_state = 'A'
+        save(m, path)
+        self.assertSameFSM(load(path), m)
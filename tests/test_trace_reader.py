@@ -0,0 +1,56 @@
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from ktail import generate_PTA, ktail
+from trace_reader import read_traces
+
+
+class TraceReaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.words = ['a b c', 'a b d', 'a b b b c', 'e']
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, name, content: bytes):
+        path = os.path.join(self.tmp_dir.name, name)
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_read_plain_file(self):
+        path = self.write('traces.txt', ('\n'.join(self.words) + '\n').encode())
+        expected = [word.split(' ') for word in self.words]
+        for chunk_size in [1, 2, 3, 7, 1 << 20]:
+            self.assertEqual(list(read_traces(path, chunk_size=chunk_size)), expected)
+            self.assertEqual(list(read_traces(path, chunk_size=chunk_size, use_mmap=True)), expected)
+
+    def test_read_gzip_file(self):
+        path = self.write('traces.gz', '\r\n'.join(self.words).encode())
+        self.assertEqual(list(read_traces(path, chunk_size=4)), [word.split(' ') for word in self.words])
+
+    def test_separators(self):
+        path = self.write('traces.log', 'a,b,c;;a,b;;ü,b'.encode())
+        self.assertEqual(list(read_traces(path, sep=',', trace_sep=';;', chunk_size=3)),
+                         [['a', 'b', 'c'], ['a', 'b'], ['ü', 'b']])
+        self.assertEqual(list(read_traces(io.StringIO('a  b\nc\n'), sep=None)), [['a', 'b'], ['c']])
+
+    def test_iterables(self):
+        self.assertEqual(list(read_traces(iter(self.words))), [word.split(' ') for word in self.words])
+        self.assertEqual(list(read_traces([('a', 'b'), ['c']])), [['a', 'b'], ['c']])
+
+    def test_ktail_with_read_traces(self):
+        path = self.write('traces.txt', '\n'.join(self.words).encode())
+        m = generate_PTA(read_traces(path, chunk_size=5))
+        self.assertEqual(m.transitions, generate_PTA(self.words).transitions)
+
+        m = ktail(read_traces(path, chunk_size=5), k=2)
+        self.assertTrue(m.is_accepted('$ a b b b c #'))
+        self.assertTrue(m.is_accepted('$ e #'))
+        self.assertFalse(m.is_accepted('$ a #'))
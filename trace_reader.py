@@ -0,0 +1,88 @@
+import gzip
+import mmap
+import os
+from typing import Iterable, Iterator, List
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def read_traces(source, sep=' ', trace_sep='\n', chunk_size=1 << 20, encoding='utf-8', use_mmap=False) \
+        -> Iterator[List[str]]:
+    """Read traces lazily from the given source and return them one by one as sequences of events.
+    The source is read in chunks of (at most) `chunk_size` bytes, so that only the current chunk and trace
+    are kept in memory, and the result can be passed to `ktail`, `generate_PTA` or `generate_prefix_tree` directly.
+
+    :param source: path to a (gzip-compressed or plain) trace file, a binary or text file object,
+                   or an iterable of words (strings) or of sequences of events
+    :param sep: separator between events in a trace, as in `str.split` (default: whitespace)
+    :param trace_sep: separator between traces in a file (default: newline)
+    :param chunk_size: number of bytes (or characters for text file objects) read at once (default: 1 MiB)
+    :param encoding: encoding of the trace file (default: utf-8)
+    :param use_mmap: whether to memory-map plain trace files instead of reading them (default: False)
+    :return: iterator over traces, each being a list of events
+    """
+    assert chunk_size > 0
+
+    if isinstance(source, (str, bytes, os.PathLike)):
+        yield from _read_trace_file(source, sep, trace_sep, chunk_size, encoding, use_mmap)
+    elif hasattr(source, 'read'):
+        yield from _split_traces(_read_chunks(source, chunk_size), sep, trace_sep, encoding)
+    else:
+        for word in source:
+            yield word.split(sep) if isinstance(word, str) else list(word)
+
+
+def _read_trace_file(path, sep, trace_sep, chunk_size, encoding, use_mmap) -> Iterator[List[str]]:
+    with open(path, 'rb') as f:
+        if f.read(len(GZIP_MAGIC)) == GZIP_MAGIC:
+            f.seek(0)
+            with gzip.GzipFile(fileobj=f, mode='rb') as gz:
+                yield from _split_traces(_read_chunks(gz, chunk_size), sep, trace_sep, encoding)
+            return
+        f.seek(0)
+
+        if use_mmap and os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                chunks = (mm[i:i + chunk_size] for i in range(0, len(mm), chunk_size))
+                yield from _split_traces(chunks, sep, trace_sep, encoding)
+        else:
+            yield from _split_traces(_read_chunks(f, chunk_size), sep, trace_sep, encoding)
+
+
+def _read_chunks(f, chunk_size) -> Iterator:
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _split_traces(chunks: Iterable, sep, trace_sep, encoding) -> Iterator[List[str]]:
+    """Split a stream of chunks (bytes or strings) into traces and the traces into events.
+    Empty traces (e.g., the one after the last trace separator in a file) are skipped.
+    """
+    remainder = None
+    for chunk in chunks:
+        if remainder is None:
+            # the first chunk decides whether we work on bytes or strings
+            binary = isinstance(chunk, bytes)
+            delimiter = trace_sep.encode(encoding) if binary else trace_sep
+            remainder = chunk[:0]
+
+        # only the (incomplete) last trace of a chunk is carried over to the next chunk
+        traces = (remainder + chunk).split(delimiter)
+        remainder = traces.pop()
+        for trace in traces:
+            if trace:
+                yield _tokenize(trace, sep, trace_sep, binary, encoding)
+
+    if remainder:
+        yield _tokenize(remainder, sep, trace_sep, binary, encoding)
+
+
+def _tokenize(trace, sep, trace_sep, binary, encoding) -> List[str]:
+    if binary:
+        trace = trace.decode(encoding)
+    if trace_sep == '\n':
+        trace = trace.rstrip('\r')  # Windows line endings
+    return trace.split(sep)